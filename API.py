@@ -6,13 +6,31 @@ to interact with the simulator by sending commands via standard input/output. Th
 
 1. Command Communication:
    - The `command` function sends instructions to the simulator and optionally processes responses based on the specified return type.
+   - Commands travel over a transport. The default `StdioTransport` uses stdin/stdout, which is how the GUI simulator
+     runs a solver; `setTransport()` swaps in any object with `write()`, `flush()` and `readline()` methods, such as
+     the offline `HeadlessSimulator`.
+   - Commands that never get a reply (`setColor`, `setText`, `setWall`, ...) are queued and sent in the same write as
+     the next command that does, so drawing costs no extra round trips. `setBatching(False)` sends every command at once,
+     and `flushCommands()` sends the queue on demand (it also runs at exit).
+   - `pipeline()` sends several commands back-to-back and then reads all their replies; `checkWalls()` uses it to read
+     several wall sensors in a single round trip.
+   - All of this state lives in a `Session`: one transport with its own command queue and sensor cache. The module level
+     functions use the default `session`, on stdin/stdout. The solver classes take a `Session` instead, so one process
+     can run many independent solves, each against its own simulator.
 
 2. Maze Information:
    - Functions like `mazeWidth()` and `mazeHeight()` retrieve the dimensions of the maze.
+   - The size is asked for on first use only, both dimensions in one round trip (`mazeSize()`), and kept for the
+     rest of the session: resets and later runs, and any solver handed the same session, get it for free.
+     Nothing is sent to the simulator when API.py is imported.
 
 3. Wall Detection:
    - Functions such as `wallFront()`, `wallBack()`, `wallLeft()`, and `wallRight()` check for walls in specific directions. 
    - Extended checks are available for diagonal directions like `wallFrontLeft()` and `wallBackRight()`.
+   - Answers to the four basic checks are cached per cell side. The mouse pose is dead-reckoned from the moves and turns
+     sent, so a repeated check, or a check of a wall already seen from the neighbouring cell, costs no round trip.
+     The pose is dropped after a crash, a half step or a 45 degree turn, and `ackReset()` clears the cache.
+     `setSensorCache(False)` turns it off.
 
 4. Movement and Rotation:
    - The robot can move using `moveForward()` or `moveForwardHalf()`.
@@ -26,128 +44,387 @@ to interact with the simulator by sending commands via standard input/output. Th
 
 7. State Management:
    - The script includes methods to check and acknowledge simulator resets (`wasReset()` and `ackReset()`).
+   - `moveForward()` also asks `wasReset` in the same write, so resets are noticed on every move without an extra
+     round trip, and raises `MouseResetError` when the reset button was pressed. The caller then calls `ackReset()`
+     and starts again from the start cell. `setResetWatch(False)` turns this off.
 
 8. Error Handling:
    - A custom exception, `MouseCrashedError`, is raised when the robot crashes while moving.
+   - `MouseResetError` is raised by `moveForward()` when the simulator was reset (see State Management).
 
 This modular design makes it easier to control the maze-solving robot and customize the maze environment programmatically.
 """
 
 ########################################################################################################################################
 
+import atexit
 import sys
 
+from Heading import DELTA_X, DELTA_Y, OPPOSITE, SIDE_OF_COMMAND
+
 class MouseCrashedError(Exception):
     pass
 
+class MouseResetError(Exception):
+    pass
+
+class StdioTransport:
+    # The simulator runs this process and talks to it over stdin/stdout
+    def write(self, data):
+        sys.stdout.write(data)
+
+    def flush(self):
+        sys.stdout.flush()
+
+    def readline(self):
+        return sys.stdin.readline()
+
+def parseResponse(response, return_type):
+    response = response.strip()
+    if return_type == bool:
+        return response == "true"
+    return return_type(response)
+
+class Session:
+    # One connection to a simulator. It holds:
+    # - pending: lines waiting to be written; commands without a reply wait here until the next reply is needed
+    # - pose: the mouse pose (x, y, direction) in simulator coordinates, or None when it is no longer known
+    # - knownWalls: the walls seen so far, keyed by (x, y, absolute direction)
+    # - size: the maze (width, height), or None until it is first asked for
+    def __init__(self, transport):
+        self.transport = transport
+        self.pending = []
+        self.batching = True
+        self.sensorCache = True
+        self.resetWatch = True
+        self.pose = (0, 0, 0)
+        self.knownWalls = {}
+        self.size = None
+
+    def setTransport(self, new_transport):
+        self.transport = new_transport
+        self.resetPose()
+        self.size = None
+
+    def setBatching(self, enabled):
+        self.batching = enabled
+        if not enabled:
+            self.flushCommands()
+
+    def flushCommands(self):
+        if self.pending:
+            self.transport.write("".join(self.pending))
+            self.transport.flush()
+            self.pending.clear()
+
+    def command(self, args, return_type=None):
+        self.pending.append(" ".join([str(x) for x in args]) + "\n")
+        if return_type or not self.batching:
+            self.flushCommands()
+        if return_type:
+            return parseResponse(self.transport.readline(), return_type)
+
+    def pipeline(self, requests):
+        # Send all (args, return_type) requests in one write, then read the replies in order
+        if not requests:
+            return []
+        for args, return_type in requests:
+            self.pending.append(" ".join([str(x) for x in args]) + "\n")
+        self.flushCommands()
+        return [parseResponse(self.transport.readline(), return_type) if return_type else None
+                for args, return_type in requests]
+
+    def mazeSize(self):
+        if self.size is None:
+            self.size = tuple(self.pipeline([(["mazeWidth"], int), (["mazeHeight"], int)]))
+        return self.size
+
+    def mazeWidth(self):
+        return self.mazeSize()[0]
+
+    def mazeHeight(self):
+        return self.mazeSize()[1]
+
+    def setResetWatch(self, enabled):
+        self.resetWatch = enabled
+
+    def setSensorCache(self, enabled):
+        self.sensorCache = enabled
+        self.knownWalls.clear()
+
+    def resetPose(self):
+        self.pose = (0, 0, 0)
+        self.knownWalls.clear()
+
+    def losePose(self):
+        self.pose = None
+
+    def movePose(self, distance):
+        if self.pose is not None:
+            x, y, direction = self.pose
+            self.pose = (x + DELTA_X[direction] * distance, y + DELTA_Y[direction] * distance, direction)
+
+    def turnPose(self, quarter_turns):
+        if self.pose is not None:
+            x, y, direction = self.pose
+            self.pose = (x, y, (direction + quarter_turns) % 4)
+
+    def wallKey(self, wallCommand, half_steps_away=None):
+        if (not self.sensorCache or self.pose is None or half_steps_away is not None
+                or wallCommand not in SIDE_OF_COMMAND):
+            return None
+        x, y, direction = self.pose
+        return (x, y, (direction + SIDE_OF_COMMAND[wallCommand]) % 4)
+
+    def rememberWall(self, key, is_wall):
+        # A wall is shared by two cells, so store it from both sides
+        x, y, direction = key
+        self.knownWalls[key] = is_wall
+        self.knownWalls[(x + DELTA_X[direction], y + DELTA_Y[direction], OPPOSITE[direction])] = is_wall
+
+    def checkWall(self, wallCommand, half_steps_away=None):
+        key = self.wallKey(wallCommand, half_steps_away)
+        if key in self.knownWalls:
+            return self.knownWalls[key]
+        args = [wallCommand]
+        if half_steps_away is not None:
+            args.append(half_steps_away)
+        is_wall = self.command(args, return_type=bool)
+        if key is not None:
+            self.rememberWall(key, is_wall)
+        return is_wall
+
+    def checkWalls(self, wallCommands):
+        keys = [self.wallKey(wallCommand) for wallCommand in wallCommands]
+        missing = [i for i, key in enumerate(keys) if key not in self.knownWalls]
+        replies = self.pipeline([([wallCommands[i]], bool) for i in missing])
+        walls = [self.knownWalls.get(key) for key in keys]
+        for i, is_wall in zip(missing, replies):
+            walls[i] = is_wall
+            if keys[i] is not None:
+                self.rememberWall(keys[i], is_wall)
+        return walls
+
+    def wallFront(self, half_steps_away=None):
+        return self.checkWall("wallFront", half_steps_away)
+
+    def wallBack(self, half_steps_away=None):
+        return self.checkWall("wallBack", half_steps_away)
+
+    def wallLeft(self, half_steps_away=None):
+        return self.checkWall("wallLeft", half_steps_away)
+
+    def wallRight(self, half_steps_away=None):
+        return self.checkWall("wallRight", half_steps_away)
+
+    def wallFrontLeft(self, half_steps_away=None):
+        return self.checkWall("wallFrontLeft", half_steps_away)
+
+    def wallFrontRight(self, half_steps_away=None):
+        return self.checkWall("wallFrontRight", half_steps_away)
+
+    def wallBackLeft(self, half_steps_away=None):
+        return self.checkWall("wallBackLeft", half_steps_away)
+
+    def wallBackRight(self, half_steps_away=None):
+        return self.checkWall("wallBackRight", half_steps_away)
+
+    def moveForward(self, distance=None):
+        args = ["moveForward"]
+        # Don't append distance argument unless explicitly specified, for
+        # backwards compatibility with older versions of the simulator
+        if distance is not None:
+            args.append(distance)
+        if self.resetWatch:
+            # Ask about a reset in the same write as the move, so it costs no extra round trip
+            response, reset = self.pipeline([(args, str), (["wasReset"], bool)])
+        else:
+            response, reset = self.command(args=args, return_type=str), False
+        if response == "crash":
+            self.losePose()
+            raise MouseCrashedError()
+        if reset:
+            self.losePose()
+            raise MouseResetError()
+        self.movePose(1 if distance is None else distance)
+
+    def moveForwardHalf(self, num_half_steps=None):
+        args = ["moveForwardHalf"]
+        if num_half_steps is not None:
+            args.append(num_half_steps)
+        self.losePose()
+        response = self.command(args=args, return_type=str)
+        if response == "crash":
+            raise MouseCrashedError()
+
+    def turnRight(self):
+        self.command(args=["turnRight"], return_type=str)
+        self.turnPose(1)
+
+    def turnLeft(self):
+        self.command(args=["turnLeft"], return_type=str)
+        self.turnPose(-1)
+
+    def turnRight90(self):
+        self.turnRight()
+
+    def turnLeft90(self):
+        self.turnLeft()
+
+    def turnRight45(self):
+        self.losePose()
+        self.command(args=["turnRight45"], return_type=str)
+
+    def turnLeft45(self):
+        self.losePose()
+        self.command(args=["turnLeft45"], return_type=str)
+
+    def setWall(self, x, y, direction):
+        self.command(args=["setWall", x, y, direction])
+
+    def clearWall(self, x, y, direction):
+        self.command(args=["clearWall", x, y, direction])
+
+    def setColor(self, x, y, color):
+        self.command(args=["setColor", x, y, color])
+
+    def clearColor(self, x, y):
+        self.command(args=["clearColor", x, y])
+
+    def clearAllColor(self):
+        self.command(args=["clearAllColor"])
+
+    def setText(self, x, y, text):
+        self.command(args=["setText", x, y, text])
+
+    def clearText(self, x, y):
+        self.command(args=["clearText", x, y])
+
+    def clearAllText(self):
+        self.command(args=["clearAllText"])
+
+    def wasReset(self):
+        return self.command(args=["wasReset"], return_type=bool)
+
+    def ackReset(self):
+        self.command(args=["ackReset"], return_type=str)
+        self.resetPose()
+
+# The default session talks to the simulator that started this process
+session = Session(StdioTransport())
+
+def setTransport(new_transport):
+    session.setTransport(new_transport)
+
+def setBatching(enabled):
+    session.setBatching(enabled)
+
+def flushCommands():
+    session.flushCommands()
+
+atexit.register(flushCommands)
+
 def command(args, return_type=None):
-    line = " ".join([str(x) for x in args]) + "\n"
-    sys.stdout.write(line)
-    sys.stdout.flush()
-    if return_type:
-        response = sys.stdin.readline().strip()
-        if return_type == bool:
-            return response == "true"
-        return return_type(response)
+    return session.command(args, return_type)
+
+def pipeline(requests):
+    return session.pipeline(requests)
+
+def mazeSize():
+    return session.mazeSize()
 
 def mazeWidth():
-    return command(args=["mazeWidth"], return_type=int)
+    return session.mazeWidth()
 
 def mazeHeight():
-    return command(args=["mazeHeight"], return_type=int)
+    return session.mazeHeight()
+
+def setResetWatch(enabled):
+    session.setResetWatch(enabled)
+
+def setSensorCache(enabled):
+    session.setSensorCache(enabled)
 
 def checkWall(wallCommand, half_steps_away=None):
-    args = [wallCommand]
-    if half_steps_away is not None:
-        args.append(half_steps_away)
-    return command(args, return_type=bool)
+    return session.checkWall(wallCommand, half_steps_away)
+
+def checkWalls(wallCommands):
+    return session.checkWalls(wallCommands)
 
 def wallFront(half_steps_away=None):
-    return checkWall("wallFront", half_steps_away)
+    return session.wallFront(half_steps_away)
 
 def wallBack(half_steps_away=None):
-    return checkWall("wallBack", half_steps_away)
+    return session.wallBack(half_steps_away)
 
 def wallLeft(half_steps_away=None):
-    return checkWall("wallLeft", half_steps_away)
+    return session.wallLeft(half_steps_away)
 
 def wallRight(half_steps_away=None):
-    return checkWall("wallRight", half_steps_away)
+    return session.wallRight(half_steps_away)
 
 def wallFrontLeft(half_steps_away=None):
-    return checkWall("wallFrontLeft", half_steps_away)
+    return session.wallFrontLeft(half_steps_away)
 
 def wallFrontRight(half_steps_away=None):
-    return checkWall("wallFrontRight", half_steps_away)
+    return session.wallFrontRight(half_steps_away)
 
 def wallBackLeft(half_steps_away=None):
-    return checkWall("wallBackLeft", half_steps_away)
+    return session.wallBackLeft(half_steps_away)
 
 def wallBackRight(half_steps_away=None):
-    return checkWall("wallBackRight", half_steps_away)
+    return session.wallBackRight(half_steps_away)
 
 def moveForward(distance=None):
-    args = ["moveForward"]
-    # Don't append distance argument unless explicitly specified, for
-    # backwards compatibility with older versions of the simulator
-    if distance is not None:
-        args.append(distance)
-    response = command(args=args, return_type=str)
-    if response == "crash":
-        raise MouseCrashedError()
+    session.moveForward(distance)
 
 def moveForwardHalf(num_half_steps=None):
-    args = ["moveForwardHalf"]
-    if num_half_steps is not None:
-        args.append(num_half_steps)
-    response = command(args=args, return_type=str)
-    if response == "crash":
-        raise MouseCrashedError()
+    session.moveForwardHalf(num_half_steps)
 
 def turnRight():
-    command(args=["turnRight"], return_type=str)
+    session.turnRight()
 
 def turnLeft():
-    command(args=["turnLeft"], return_type=str)
+    session.turnLeft()
 
 def turnRight90():
-    turnRight()
+    session.turnRight90()
 
 def turnLeft90():
-    turnLeft()
+    session.turnLeft90()
 
 def turnRight45():
-    command(args=["turnRight45"], return_type=str)
+    session.turnRight45()
 
 def turnLeft45():
-    command(args=["turnLeft45"], return_type=str)
+    session.turnLeft45()
 
 def setWall(x, y, direction):
-    command(args=["setWall", x, y, direction])
+    session.setWall(x, y, direction)
 
 def clearWall(x, y, direction):
-    command(args=["clearWall", x, y, direction])
+    session.clearWall(x, y, direction)
 
 def setColor(x, y, color):
-    command(args=["setColor", x, y, color])
+    session.setColor(x, y, color)
 
 def clearColor(x, y):
-    command(args=["clearColor", x, y])
+    session.clearColor(x, y)
 
 def clearAllColor():
-    command(args=["clearAllColor"])
+    session.clearAllColor()
 
 def setText(x, y, text):
-    command(args=["setText", x, y, text])
+    session.setText(x, y, text)
 
 def clearText(x, y):
-    command(args=["clearText", x, y])
+    session.clearText(x, y)
 
 def clearAllText():
-    command(args=["clearAllText"])
+    session.clearAllText()
 
 def wasReset():
-    return command(args=["wasReset"], return_type=bool)
+    return session.wasReset()
 
 def ackReset():
-    command(args=["ackReset"], return_type=str)
\ No newline at end of file
+    session.ackReset()
\ No newline at end of file
@@ -0,0 +1,197 @@
+########################################################################################################################################
+                                                        # Async Transport File #
+
+"""
+This script runs many robot sessions at once from one controller process, each against its own simulator process,
+with a timeout on every request, so a hung simulator fails its run instead of hanging the whole batch.
+
+1. Transport:
+   - `AsyncTransport` speaks the same line protocol as `API.command`, over asyncio streams: the pipes of a child
+     process (`open_process()`) or a local TCP socket (`open_socket()`).
+   - Every request is bounded by `timeout` seconds: a write that cannot drain or a reply that does not arrive in time
+     raises `SimulatorTimeoutError`, and a simulator that closes the stream raises `ConnectionError`.
+   - It also has the blocking `write()`, `flush()` and `readline()` methods of an `API.Session` transport. They hand
+     the work to the event loop, so the existing solver classes run unchanged on top of it, each in a worker thread,
+     while all the I/O happens on one event loop.
+
+2. Controller:
+   - `run_session()` starts `HeadlessSimulator.py` on a maze (over pipes, or over a socket with `use_socket`),
+     runs a solver on an `API.Session` over the transport, and returns how the run ended.
+   - `run_sessions()` runs one session per maze concurrently, with at most `concurrency` sessions (solvers and their
+     simulator processes) at a time:
+         python AsyncTransport.py mazes/ [--solver NAME] [--timeout SECONDS] [--concurrency N] [--socket]
+"""
+
+########################################################################################################################################
+
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import API
+import Benchmark
+import Trace
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+SIMULATOR_SCRIPT = os.path.join(REPO_DIR, "HeadlessSimulator.py")
+
+# Seconds to wait for each reply
+DEFAULT_TIMEOUT = 5.0
+
+
+class SimulatorTimeoutError(TimeoutError):
+    pass
+
+
+class AsyncTransport:
+    def __init__(self, reader, writer, loop, timeout=DEFAULT_TIMEOUT):
+        self.reader = reader
+        self.writer = writer
+        self.loop = loop
+        self.timeout = timeout
+        self.buffer = []
+
+    async def send(self, data):
+        self.writer.write(data.encode())
+        try:
+            await asyncio.wait_for(self.writer.drain(), self.timeout)
+        except asyncio.TimeoutError:
+            raise SimulatorTimeoutError("the simulator did not take the commands within {} s".format(self.timeout))
+
+    async def receive_line(self):
+        try:
+            line = await asyncio.wait_for(self.reader.readline(), self.timeout)
+        except asyncio.TimeoutError:
+            raise SimulatorTimeoutError("no reply from the simulator within {} s".format(self.timeout))
+        if not line:
+            raise ConnectionError("the simulator closed the connection")
+        return line.decode()
+
+    async def close(self):
+        self.writer.close()
+        try:
+            await asyncio.wait_for(self.writer.wait_closed(), self.timeout)
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+
+    # Blocking transport interface used by API.Session, called from a solver thread
+
+    def write(self, data):
+        self.buffer.append(data)
+
+    def flush(self):
+        if self.buffer:
+            data = "".join(self.buffer)
+            self.buffer.clear()
+            asyncio.run_coroutine_threadsafe(self.send(data), self.loop).result()
+
+    def readline(self):
+        return asyncio.run_coroutine_threadsafe(self.receive_line(), self.loop).result()
+
+
+async def open_process(maze_path, timeout=DEFAULT_TIMEOUT):
+    '''Start a headless simulator on maze_path and connect to its stdin/stdout.'''
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, SIMULATOR_SCRIPT, maze_path,
+        stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+    transport = AsyncTransport(process.stdout, process.stdin, asyncio.get_running_loop(), timeout)
+    return process, transport
+
+
+async def open_socket(maze_path, timeout=DEFAULT_TIMEOUT):
+    '''Start a headless simulator listening on a free local port and connect to it.'''
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, SIMULATOR_SCRIPT, maze_path, "--port", "0",
+        stdin=asyncio.subprocess.DEVNULL, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE)
+    # The simulator announces its port on stderr: "Listening on 127.0.0.1:PORT"
+    line = (await asyncio.wait_for(process.stderr.readline(), timeout)).decode()
+    host, port = line.split()[-1].rsplit(":", 1)
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, int(port)), timeout)
+    writer.get_extra_info("socket").setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return process, AsyncTransport(reader, writer, asyncio.get_running_loop(), timeout)
+
+
+async def run_session(maze_path, solver, timeout=DEFAULT_TIMEOUT, use_socket=False, **options):
+    '''Run one solver against its own simulator process and return a record of the run.'''
+    script, class_name = Benchmark.SOLVERS[solver]
+    solver_class = getattr(Benchmark.load_solver(os.path.join(REPO_DIR, script)), class_name)
+    options.setdefault("log", Trace.Logger(solver, Trace.OFF))
+    start = time.perf_counter()
+    process, transport = await (open_socket if use_socket else open_process)(maze_path, timeout)
+    session = API.Session(transport)
+
+    def solve():
+        solver_class(session, **options).run()
+        session.flushCommands()
+
+    error = None
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, solve)
+    except Exception as exc:
+        error = "{}: {}".format(type(exc).__name__, exc)
+    await transport.close()
+    try:
+        await asyncio.wait_for(process.wait(), timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+    # The simulator reports where the mouse finished as the last line on stderr
+    report = (await process.stderr.read()).decode().strip().splitlines()
+    return {
+        "maze": maze_path,
+        "solver": solver,
+        "error": error,
+        "seconds": round(time.perf_counter() - start, 3),
+        "simulator": report[-1] if report else "",
+    }
+
+
+async def run_sessions(maze_paths, solver, timeout=DEFAULT_TIMEOUT, concurrency=None, use_socket=False):
+    '''Run one session per maze concurrently and yield each record as it finishes.'''
+    if not maze_paths:
+        return
+    concurrency = concurrency or len(maze_paths)
+    # Every running solver holds a worker thread while it waits for the simulator
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=concurrency))
+    limit = asyncio.Semaphore(concurrency)
+
+    async def limited_session(path):
+        # The simulator is only started once a slot is free, so the session's time does not include the wait
+        async with limit:
+            return await run_session(path, solver, timeout, use_socket)
+
+    tasks = [asyncio.create_task(limited_session(path)) for path in maze_paths]
+    for task in asyncio.as_completed(tasks):
+        yield await task
+
+
+async def run_all(args):
+    maze_paths = []
+    for path in args.mazes:
+        maze_paths.extend(Benchmark.maze_files(path) if os.path.isdir(path) else [path])
+    start = time.perf_counter()
+    failures = 0
+    async for record in run_sessions(maze_paths, args.solver, args.timeout, args.concurrency, args.socket):
+        failures += record["error"] is not None
+        print("{maze:<32} {status:<5} {seconds:>7.2f} s  {detail}".format(
+            status="ok" if record["error"] is None else "FAIL",
+            detail=record["error"] or record["simulator"], **record), flush=True)
+    print("{} sessions, {} failed, {:.2f} s".format(len(maze_paths), failures, time.perf_counter() - start))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a solver against many simulator processes at once.")
+    parser.add_argument("mazes", nargs="+", help="maze files or directories of .num / .map mazes")
+    parser.add_argument("--solver", choices=sorted(Benchmark.SOLVERS), default="FloodfillAlgorithm")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="seconds to wait for each reply")
+    parser.add_argument("--concurrency", type=int, help="solvers running at once (default: all)")
+    parser.add_argument("--socket", action="store_true", help="talk to the simulators over local sockets, not pipes")
+    asyncio.run(run_all(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+########################################################################################################################################
+                                                            # Benchmark File #
+
+"""
+This script runs every solver on every maze of a directory against the headless simulator, and reports how efficiently
+each one solved it, so regressions in solver efficiency show up as numbers instead of guesswork.
+
+1. Runs:
+   - Each solver in `SOLVERS` (FloodfillAlgorithm.py, RighthandRule.py and LefthandRule (1).py) is loaded once, and a
+     new solver object is created for every maze with its own `API.Session` talking to a `HeadlessSimulator` in the
+     same process, so there is no GUI, no animation and no state shared between runs.
+   - A run fails if the solver raises (for example `MouseCrashedError`), moves more than `MOVE_LIMIT_PER_CELL` times
+     the number of cells, or stops anywhere other than a cell it labeled "Goal".
+
+2. Metrics (one record per maze and solver):
+   - `success`, `cells` (cells traversed), `distance` (path length in cells, shorter than `cells` when the route cuts
+     diagonals), `turns`, `commands`, and `round_trips` (writes that waited for a reply).
+   - `planning_cpu_ms`: CPU time spent in the solver itself. This is the whole run minus the time spent inside the
+     simulator, so it covers sensing logic, map updates and path planning only. Every pair is run `CPU_RUNS` times
+     (`--cpu-runs`) and the fastest run is kept, as a single sample swings with whatever else the machine is doing.
+
+3. Report and Baseline:
+   - The records are written as JSON (`--report`, default `benchmark_report.json`).
+   - They are compared with a stored baseline (`--baseline`, default `mazes/baseline.json`). A run regresses if it no
+     longer succeeds or needs more cells, turns, commands or round trips than before; these counts are the same on
+     every run. Regressions are listed and the exit code is 1.
+   - Planning CPU time is listed as drift when it is more than `CPU_TOLERANCE` times and `CPU_SLACK_MS` above the
+     baseline. Timings still depend on the machine, so drift is only reported and does not change the exit code.
+   - `--update-baseline` stores the current results as the new baseline.
+         python Benchmark.py [--mazes DIR] [--report FILE] [--baseline FILE] [--update-baseline] [--cpu-runs N]
+"""
+
+########################################################################################################################################
+
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import time
+
+import API
+import HeadlessSimulator
+import Trace
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Solver name: (script, solver class)
+SOLVERS = {
+    "FloodfillAlgorithm": ("FloodfillAlgorithm.py", "FloodfillSolver"),
+    "RighthandRule": ("RighthandRule.py", "RighthandSolver"),
+    "LefthandRule": ("LefthandRule (1).py", "LefthandSolver"),
+}
+
+COUNTED_METRICS = ("cells", "turns", "commands", "round_trips")
+MOVE_LIMIT_PER_CELL = 20
+# Runs per maze and solver; the lowest planning CPU time is kept
+CPU_RUNS = 5
+CPU_TOLERANCE = 1.5
+CPU_SLACK_MS = 5.0
+
+
+class TimedSimulator(HeadlessSimulator.HeadlessSimulator):
+    '''A HeadlessSimulator that adds up the CPU time spent inside it.'''
+
+    def __init__(self, maze, move_limit=None):
+        super().__init__(maze, move_limit)
+        self.cpu_time = 0.0
+
+    def write(self, data):
+        start = time.process_time()
+        try:
+            super().write(data)
+        finally:
+            self.cpu_time += time.process_time() - start
+
+    def readline(self):
+        start = time.process_time()
+        try:
+            return super().readline()
+        finally:
+            self.cpu_time += time.process_time() - start
+
+
+loaded_modules = {}
+
+
+def load_solver(path):
+    '''Import a solver script once; its file name may not be a valid module name (e.g. "LefthandRule (1).py").'''
+    if path not in loaded_modules:
+        spec = importlib.util.spec_from_file_location(os.path.splitext(os.path.basename(path))[0], path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        loaded_modules[path] = module
+    return loaded_modules[path]
+
+
+def run_solver(solver, maze, **options):
+    '''Solve maze with a new solver object (options are passed to its class) and return the run's metrics.
+
+    Logging is off unless options pass a Trace.Logger as log.
+    '''
+    script, class_name = SOLVERS[solver]
+    solver_class = getattr(load_solver(os.path.join(REPO_DIR, script)), class_name)
+    simulator = TimedSimulator(maze, move_limit=MOVE_LIMIT_PER_CELL * maze.width * maze.height)
+    session = API.Session(simulator)
+    options.setdefault("log", Trace.Logger(solver, Trace.OFF))
+    error = None
+    start = time.process_time()
+    try:
+        solver_class(session, **options).run()
+        session.flushCommands()
+    except Exception as exc:
+        error = "{}: {}".format(type(exc).__name__, exc)
+    cpu_time = time.process_time() - start - simulator.cpu_time
+
+    goals = {cell for cell, text in simulator.texts.items() if text == "Goal"}
+    return {
+        "success": error is None and (simulator.x, simulator.y) in goals,
+        "cells": simulator.cells_moved,
+        "distance": round(simulator.distance, 2),
+        "turns": simulator.turns,
+        "commands": simulator.commands,
+        "round_trips": simulator.round_trips,
+        "planning_cpu_ms": round(cpu_time * 1000, 3),
+        "error": error,
+    }
+
+
+def maze_files(directory):
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                  if name.endswith((".num", ".map")))
+
+
+def run_all(directory, cpu_runs=CPU_RUNS):
+    results = []
+    for maze_path in maze_files(directory):
+        maze = HeadlessSimulator.load_maze(maze_path)
+        for solver in SOLVERS:
+            record = {"maze": os.path.basename(maze_path), "solver": solver}
+            record.update(run_solver(solver, maze))
+            # The counts are the same every time; only the timing varies
+            for _ in range(cpu_runs - 1):
+                record["planning_cpu_ms"] = min(record["planning_cpu_ms"], run_solver(solver, maze)["planning_cpu_ms"])
+            results.append(record)
+            print("{maze:<16} {solver:<20} {status:<5} {cells:>6} cells {turns:>6} turns {round_trips:>6} round trips "
+                  "{planning_cpu_ms:>9.2f} ms".format(status="ok" if record["success"] else "FAIL", **record))
+    return results
+
+
+def find_regressions(results, baseline):
+    '''Return (regressions, cpu_drift): lists of messages for worse counts and for slower planning.'''
+    previous = {(record["maze"], record["solver"]): record for record in baseline}
+    regressions = []
+    cpu_drift = []
+    for record in results:
+        old = previous.get((record["maze"], record["solver"]))
+        if old is None:
+            continue
+        name = "{} / {}".format(record["maze"], record["solver"])
+        if old["success"] and not record["success"]:
+            regressions.append("{}: no longer reaches the goal ({})".format(name, record["error"]))
+            continue
+        for metric in COUNTED_METRICS:
+            if record[metric] > old[metric]:
+                regressions.append("{}: {} went from {} to {}".format(name, metric, old[metric], record[metric]))
+        new_cpu, old_cpu = record["planning_cpu_ms"], old["planning_cpu_ms"]
+        if new_cpu > old_cpu * CPU_TOLERANCE and new_cpu > old_cpu + CPU_SLACK_MS:
+            cpu_drift.append("{}: planning CPU went from {:.2f} ms to {:.2f} ms".format(name, old_cpu, new_cpu))
+    return regressions, cpu_drift
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every solver on every maze with the headless simulator.")
+    parser.add_argument("--mazes", default=os.path.join(REPO_DIR, "mazes"), help="directory of .num / .map mazes")
+    parser.add_argument("--report", default="benchmark_report.json", help="where to write the JSON report")
+    parser.add_argument("--baseline", default=os.path.join(REPO_DIR, "mazes", "baseline.json"),
+                        help="JSON report to compare against")
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--cpu-runs", type=int, default=CPU_RUNS, help="runs per maze and solver for the CPU time")
+    args = parser.parse_args()
+
+    results = run_all(args.mazes, max(1, args.cpu_runs))
+    with open(args.report, "w") as report:
+        json.dump(results, report, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as baseline:
+            json.dump(results, baseline, indent=2)
+        print("Baseline updated: {}".format(args.baseline))
+        return
+    if not os.path.exists(args.baseline):
+        print("No baseline at {}; run with --update-baseline to create one".format(args.baseline))
+        return
+    with open(args.baseline) as baseline:
+        regressions, cpu_drift = find_regressions(results, json.load(baseline))
+    for drift in cpu_drift:
+        print("CPU DRIFT " + drift)
+    for regression in regressions:
+        print("REGRESSION " + regression)
+    if regressions:
+        sys.exit(1)
+    print("No regressions against {}".format(args.baseline))
+
+
+if __name__ == "__main__":
+    main()
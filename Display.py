@@ -0,0 +1,129 @@
+########################################################################################################################################
+                                                            # Display File #
+
+"""
+This script provides `Display`, the layer the solvers draw through (cell colors, cell text and walls). It keeps a
+shadow copy of what the simulator shows and only sends the commands that change something.
+
+1. Shadow Copy:
+   - `shown_colors`, `shown_texts` and `shown_walls` hold what the simulator is showing. A wall is stored on both
+     cells it separates, as the simulator draws it, so marking it again from the other side sends nothing.
+   - Drawing requests only update the wanted state; `send_changes()` compares it with the shadow copy and sends `setColor`,
+     `clearColor`, `setText`, `clearText`, `setWall` or `clearWall` for the differences alone. Repainting a cell with
+     its current color, or marking a known wall again, costs a dictionary lookup and no simulator traffic.
+
+2. Modes:
+   - `LIVE` (default): every change is sent straight away, as the solvers always did.
+   - `THROTTLED`: changes are collected and sent at most `rate` times per second, so the GUI keeps up with a fast run.
+     The last state is always sent by the final `flush()`, which also writes out the API's command queue.
+   - `AT_END`: nothing is drawn until the solver calls `flush()` at the end of its run.
+   - Every solver has `DRAW_MODE` and `DRAW_RATE` constants and takes a `display` argument.
+"""
+
+########################################################################################################################################
+
+import time
+
+from Heading import DELTA_X, DELTA_Y, OPPOSITE, WALL_CHARS
+
+LIVE = "live"
+THROTTLED = "throttled"
+AT_END = "end"
+
+
+class Display:
+    def __init__(self, api, mode=LIVE, rate=30):
+        if mode not in (LIVE, THROTTLED, AT_END):
+            raise ValueError("unknown display mode: {}".format(mode))
+        self.api = api
+        self.mode = mode
+        self.interval = 1.0 / rate
+        self.last_flush = time.perf_counter()
+        self.shown_colors = {}
+        self.shown_texts = {}
+        self.shown_walls = set()
+        # Changes not sent yet: cell (or wall) -> wanted value, None meaning cleared
+        self.colors = {}
+        self.texts = {}
+        self.walls = {}
+
+    def changed(self):
+        if self.mode == LIVE:
+            self.send_changes()
+        elif self.mode == THROTTLED and time.perf_counter() - self.last_flush >= self.interval:
+            self.send_changes()
+
+    def set_color(self, x, y, color):
+        if self.colors.get((x, y), self.shown_colors.get((x, y))) != color:
+            self.colors[x, y] = color
+            self.changed()
+
+    def clear_color(self, x, y):
+        self.set_color(x, y, None)
+
+    def set_text(self, x, y, text):
+        if self.texts.get((x, y), self.shown_texts.get((x, y))) != text:
+            self.texts[x, y] = text
+            self.changed()
+
+    def clear_text(self, x, y):
+        self.set_text(x, y, None)
+
+    def set_wall(self, x, y, direction, present=True):
+        '''Mark a wall, with direction as a number (North = 0) or as one of "nesw".'''
+        if isinstance(direction, str):
+            direction = WALL_CHARS.index(direction)
+        wall = (x, y, direction)
+        if self.walls.get(wall, wall in self.shown_walls) != present:
+            self.walls[wall] = present
+            self.changed()
+
+    def clear_wall(self, x, y, direction):
+        self.set_wall(x, y, direction, False)
+
+    def clear_walls(self):
+        '''Remove every wall marked so far.'''
+        for x, y, direction in list(self.shown_walls) + list(self.walls):
+            self.set_wall(x, y, direction, False)
+
+    def send_changes(self):
+        '''Send the commands for every change that is still waiting.'''
+        api = self.api
+        for (x, y), color in self.colors.items():
+            if self.shown_colors.get((x, y)) == color:
+                continue
+            if color is None:
+                api.clearColor(x, y)
+                del self.shown_colors[x, y]
+            else:
+                api.setColor(x, y, color)
+                self.shown_colors[x, y] = color
+        for (x, y), text in self.texts.items():
+            if self.shown_texts.get((x, y)) == text:
+                continue
+            if text is None:
+                api.clearText(x, y)
+                del self.shown_texts[x, y]
+            else:
+                api.setText(x, y, text)
+                self.shown_texts[x, y] = text
+        for (x, y, direction), present in self.walls.items():
+            if ((x, y, direction) in self.shown_walls) == present:
+                continue
+            other_side = (x + DELTA_X[direction], y + DELTA_Y[direction], OPPOSITE[direction])
+            if present:
+                api.setWall(x, y, WALL_CHARS[direction])
+                self.shown_walls.update(((x, y, direction), other_side))
+            else:
+                api.clearWall(x, y, WALL_CHARS[direction])
+                self.shown_walls.difference_update(((x, y, direction), other_side))
+        self.colors.clear()
+        self.texts.clear()
+        self.walls.clear()
+        self.last_flush = time.perf_counter()
+
+    def flush(self):
+        '''Draw everything now; the solvers call this at the end of their run.'''
+        self.send_changes()
+        # Drawing commands have no reply, so make sure they are not left waiting in the API's write queue
+        self.api.flushCommands()
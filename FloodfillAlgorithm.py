@@ -5,38 +5,96 @@
 This script implements a flood-fill algorithm for navigating a robot through a maze simulation. It uses a grid-based representation and sensor data to detect walls and determine the optimal path to a goal. Key components and functionalities include:
 
 1. Grid Representation:
-   - The maze is represented as a grid of size `16x16` (`MAX_X` and `MAX_Y`).
-   - `flood_fill_path` stores the shortest path distances to the goal, initialized with `-1`.
-   - `wall_info` encodes wall information for each cell using bit flags.
+   - All state lives in a `FloodfillSolver`, which talks to the simulator through the `API.Session` it is given, so
+     several solvers can run side by side in one process. Nothing is sent to the simulator on import.
+   - The maze is represented as a grid of `max_x` columns by `max_y` rows (the maze width and height), so
+     rectangular mazes work as well as the usual `16x16`.
+   - `maze_map` is a `MazeMap` (see MazeMap.py) holding contiguous arrays for the wall bit flags of each cell and the
+     shortest path distances to the goal, initialized with `UNREACHABLE`.
+   - Creating a solver sends nothing either: `prepare_map()` asks the session for the maze size (one round trip,
+     cached by the session) and allocates the map when `run()` starts. Resets and later runs reuse it, and a solver
+     taking over a wall follower's run uses its map without asking at all.
+   - The robot's position, the start, goals and targets are all flat cell indices into those arrays. Moving adds the
+     map's offset for the heading, and `maze_map.cell_xy[cell]` gives the simulator coordinates to draw at.
 
 2. Wall Detection and Update:
-   - `fetch_sensor_data()` collects sensor readings to detect walls on the left, front, and right sides of the robot.
-   - `update_wall_info()` updates the `wall_info` array based on sensor data and the robot's current orientation.
+   - `fetch_sensor_data()` collects sensor readings to detect walls on the left, front, and right sides of the robot,
+     reading all three in one round trip.
+   - `update_wall_info()` records walls in `maze_map` based on sensor data and the robot's current orientation,
+     and returns the cells next to any wall that was not known before.
 
 3. Flood-Fill Algorithm:
-   - `flood_fill()` calculates the shortest path distances from the goal to all reachable cells using a recursive flood-fill approach.
+   - `flood_fill()` calculates the shortest path distances from the goal to all reachable cells using an iterative
+     breadth-first search. It runs once, on the empty map, at the start of the run.
+   - Every goal cell is seeded at distance 0 in the same search, so distances lead to the nearest goal cell
+     of the center, whatever the maze size.
+   - `repair_flood_fill()` keeps the distances up to date as walls are discovered. It only touches the cells whose
+     distance actually changes, so the cost of a step scales with the region a new wall affects, not the whole grid.
+   - `FLOOD_FILL_BACKEND` (or the solver's `backend` argument) selects how distances are computed: `"bfs"` (the default, described above) or
+     `"wavefront"`, which recomputes the whole grid with NumPy array operations whenever a new wall is found.
+     FloodfillBenchmark.py compares the two, and the original recursive flood fill, on the same mazes.
 
 4. Pathfinding:
-   - `determine_next_move()` uses the `flood_fill_path` array and wall information to select the next direction with the lowest distance value.
-   - Priority is given to cells that are closer to the goal and not blocked by walls.
+   - `determine_next_move()` uses the distances in `maze_map` and wall information to select the next direction with the lowest distance value.
+   - Priority is given to cells that are closer to the goal and not blocked by walls; ties are broken in the order of
+     `MOVE_PREFERENCE` (up, left, right, down).
+   - Headings, sides and turns come from the lookup tables in Heading.py, so sensing, turning and moving index a table
+     with the current heading instead of branching on it.
 
 5. Robot Movement:
    - `rotate_robot()` aligns the robot to the next desired direction.
-   - `advance_robot()` moves the robot forward and updates its position on the grid.
+   - `advance_robot()` moves the robot forward, updates its position on the grid and adds the cell to `visited_cells`.
+   - `navigate_to()` runs the sense / repair / move loop until the robot stands on one of the target cells.
+   - `take_over()` continues a run started by a wall follower, from its pose and with the walls it has seen.
 
 6. Maze Customization:
    - Colors and text are used to visualize the maze:
      - Start position is marked with red (`R`).
      - Goal positions are marked with green (`G`).
      - Visited cells are marked with blue (`B`).
+     - The speed run route is marked with dark yellow (`Y`).
 
 7. Goal Detection:
-   - The robot stops when it reaches one of the predefined goal positions.
-
-8. Main Function:
-   - Initializes the flood-fill path and sets the start and goal positions.
+   - `center_goals()` derives the goal cells from `max_x` and `max_y`: the 2x2 center of an even sized maze
+     (a 2x1, 1x2 or single cell center when a side is odd).
+   - The robot stops when it reaches one of the goal positions.
+
+8. Speed Run:
+   - With `EXPLORATION = "optimal"`, the robot does not stop exploring at the goal. `unproven_cells()` compares the
+     distances with unknown walls treated as open (a lower bound) with the distances through visited cells only
+     (a real route). While they differ at the start, `explore_until_optimal()` drives to the nearest unvisited cell
+     that lies on an optimistic shortest route. Once they agree, the known route is proven shortest, without
+     sweeping the rest of the maze. The optimistic distances are kept from one step to the next and only repaired
+     around new walls, and `visit_nearest()` drives to the next cell along a path searched from the robot, which
+     stops at the nearest candidate instead of filling the whole maze.
+   - After the exploration pass reaches the goal, the robot explores its way back to the start.
+   - `speed_run()` then asks SpeedRun.py for the fastest route over the visited cells, using Dijkstra's algorithm with
+     turn costs, and drives it with one multi-cell `moveForward(n)` per straight. `SPEED_RUN` (or `speed_run`) turns this off.
+   - With `DIAGONAL_SPEED_RUN` (or `diagonal`), `diagonal_speed_run()` plans on SpeedRun.py's half-cell grid instead
+     and drives the route with `moveForwardHalf(n)`, `turnLeft45()` and `turnRight45()`, cutting diagonally through
+     zig-zag corridors. It is off by default, as the GUI only models half steps in newer versions.
+
+9. Main Function:
+   - `run()` prepares the map and sets the start and goal positions.
    - Continuously updates the flood-fill path, determines the next move, and advances the robot until a goal is reached.
-   - Logs the completion time upon reaching the goal.
+   - Logs the completion time upon reaching the goal, then returns to the start and does the speed run.
+   - `run()` survives simulator resets: `API.moveForward()` notices them without an extra round trip and raises
+     `API.MouseResetError`, and `restart()` acknowledges the reset, puts the robot back on the start cell and runs
+     again with the walls learned so far.
+   - `main()` runs a solver on the default `API.session`, the simulator that started this script.
+   - Progress is logged through Trace.py: `LOG_LEVEL` chooses how much (every sensor read and move at `Trace.DEBUG`,
+     milestones only at the default `Trace.INFO`), and `TRACE_FILE` sends it to a JSON lines file instead of stderr.
+   - Drawing goes through a `Display` (see Display.py), which skips colors, texts and walls the simulator already
+     shows. `DRAW_MODE` can also limit drawing to `DRAW_RATE` updates per second, or to the end of the run.
+   - With `MAP_FILE` set, `load_map()` starts the run from the walls saved by the last run (see MazeMap.save())
+     and draws them, so the robot heads straight down the shortest known path. `map_is_stale()` checks every
+     sensor reading against the loaded map; on the first contradiction `forget_map()` drops it and the run
+     continues from an empty map. `save_map()` stores the map again at the end of the run. The speed run only
+     uses cells visited in this run, so a loaded map can never steer it into a wall.
+   - `INSTRUMENT` times each phase in `PHASES` and every API command (see Instrumentation.py) and prints a summary
+     at exit, or writes it to `INSTRUMENT_FILE`.
+   - `RECORD_FILE` records every command and reply of the run to a replay log (see Replay.py), which can be played
+     back to the solver later without the simulator.
 
 This implementation combines logical navigation, real-time wall detection, and a visualization mechanism to navigate the maze effectively using the flood-fill algorithm.
 """
@@ -44,191 +102,498 @@ This implementation combines logical navigation, real-time wall detection, and a
 ########################################################################################################################################
 
 import API
+import os
 import time
-import sys
-
-MAX_X = API.mazeWidth()
-MAX_Y = API.mazeHeight()
-
-# Global Variable
-current_row = MAX_X - 1  # Starting at the bottom-left corner
-current_col = 0
-
-flood_fill_path = [[-1 for _ in range(MAX_Y)] for _ in range(MAX_X)]
-wall_info = [[0 for _ in range(MAX_Y)] for _ in range(MAX_X)]
-
-# Check if there is a wall in a specific direction
-is_wall_left = False
-is_wall_right = False
-is_wall_front = False
-
-# Robout directions:
-# Let: Up = 0, Right = 1, Down = 2, Left = 3
-next_direction = 1
-current_direction = 0
-
-
-def log_message(text):
-    sys.stderr.write(text)
-    sys.stderr.flush()
-
-def initialize_flood_fill_path():
-    '''Initialize flood_fill_path array to default values.'''
-    global flood_fill_path
-    flood_fill_path = [[-1 for _ in range(MAX_Y)] for _ in range(MAX_X)]
-
-
-def flood_fill(row, col, distance):
-    '''Apply Flood Fill Algorithm'''
-    if row < 0 or row >= MAX_X or col < 0 or col >= MAX_Y:
-        return
-    if flood_fill_path[row][col] <= distance and flood_fill_path[row][col] != -1:
-        return
-    flood_fill_path[row][col] = distance
-
-    if col < MAX_Y - 1 and not (wall_info[row][col] & 0b0100):
-        flood_fill(row, col + 1, distance + 1)
-    if col > 0 and not (wall_info[row][col - 1] & 0b0100):
-        flood_fill(row, col - 1, distance + 1)
-    if row < MAX_X - 1 and not (wall_info[row][col] & 0b0010):
-        flood_fill(row + 1, col, distance + 1)
-    if row > 0 and not (wall_info[row - 1][col] & 0b0010):
-        flood_fill(row - 1, col, distance + 1)
-
-
-def fetch_sensor_data():
-    '''Collecting sensor data'''
-    global is_wall_left, is_wall_right, is_wall_front
-    is_wall_left = API.wallLeft()
-    is_wall_front = API.wallFront()
-    is_wall_right = API.wallRight()
-    log_message("Sensor Data - Left: {}, Front: {}, Right: {}\n".format(is_wall_left, is_wall_front, is_wall_right))
-    
-
-def update_wall_info():
-    '''Update wall information in the wall_info array'''
-    max_index = MAX_X - 1
-    if current_direction == 0:  # Facing Up
-        if is_wall_left and current_col > 0:
-            wall_info[current_row][current_col - 1] |= 0b0100
-            API.setWall(current_col, max_index - current_row, 'w')
-        if is_wall_right and current_col < max_index:
-            wall_info[current_row][current_col] |= 0b0100
-            API.setWall(current_col, max_index - current_row, 'e')
-        if is_wall_front and current_row > 0:
-            wall_info[current_row - 1][current_col] |= 0b0010
-            API.setWall(current_col, max_index - current_row, 'n')
-    elif current_direction == 1:  # Facing Right
-        if is_wall_left and current_row > 0:
-            wall_info[current_row - 1][current_col] |= 0b0010
-            API.setWall(current_col, max_index - current_row, 'n')
-        if is_wall_right and current_row < max_index:
-            wall_info[current_row][current_col] |= 0b0010
-            API.setWall(current_col, max_index - current_row, 's')
-        if is_wall_front and current_col < max_index:
-            wall_info[current_row][current_col] |= 0b0100
-            API.setWall(current_col, max_index - current_row, 'e')
-    elif current_direction == 2:  # Facing Down
-        if is_wall_left and current_col < max_index:
-            wall_info[current_row][current_col] |= 0b0100
-            API.setWall(current_col, max_index - current_row, 'e')
-        if is_wall_right and current_col > 0:
-            wall_info[current_row][current_col - 1] |= 0b0100
-            API.setWall(current_col, max_index - current_row, 'w')
-        if is_wall_front and current_row < max_index:
-            wall_info[current_row][current_col] |= 0b0010
-            API.setWall(current_col, max_index - current_row, 's')
-    elif current_direction == 3:  # Facing Left
-        if is_wall_left and current_row < max_index:
-            wall_info[current_row][current_col] |= 0b0010
-            API.setWall(current_col, max_index - current_row, 's')
-        if is_wall_right and current_row > 0:
-            wall_info[current_row - 1][current_col] |= 0b0010
-            API.setWall(current_col, max_index - current_row, 'n')
-        if is_wall_front and current_col > 0:
-            wall_info[current_row][current_col - 1] |= 0b0100
-            API.setWall(current_col, max_index - current_row, 'w')
-
-def determine_next_move():
-    '''Determine the best direction for the robot'''
-    global next_direction
-    left = flood_fill_path[current_row][current_col - 1] if current_col > 0 else 99
-    right = flood_fill_path[current_row][current_col + 1] if current_col < MAX_X - 1 else 99
-    up = flood_fill_path[current_row - 1][current_col] if current_row > 0 else 99
-    down = flood_fill_path[current_row + 1][current_col] if current_row < MAX_X - 1 else 99
-
-    # Check walls
-    if current_row > 0 and (wall_info[current_row - 1][current_col] & 0b0010):
-        up = 99
-    if current_col > 0 and (wall_info[current_row][current_col - 1] & 0b0100):
-        left = 99
-    if current_col < MAX_X - 1 and (wall_info[current_row][current_col] & 0b0100):
-        right = 99
-    if current_row < MAX_X - 1 and (wall_info[current_row][current_col] & 0b0010):
-        down = 99
-
-    # Determine direction
-    next_direction = min((up, 0), (left, 3), (right, 1), (down, 2), key=lambda x: x[0])[1]
-
-
-def rotate_robot():
-    '''Rotate the robot in the specified direction'''
-    global current_direction
-    while current_direction != next_direction:
-        if (current_direction - next_direction) % 4 == 1:
-            API.turnLeft()
-            current_direction = (current_direction - 1) % 4
+import SpeedRun
+import Trace
+from Display import Display
+from Heading import ABSOLUTE, FRONT, LEFT, RIGHT, SIDE_BITS, TURNS, WALL_BITS, WALL_CHARS
+from Instrumentation import Instrumentation
+from MazeMap import MazeMap, UNREACHABLE
+
+# Distance engine: "bfs" or "wavefront" (needs NumPy)
+FLOOD_FILL_BACKEND = "bfs"
+
+# Return to the start after reaching the goal and drive the fastest known route
+SPEED_RUN = True
+
+# Plan the speed run on the half-cell grid, with diagonal straights and 45 degree turns
+DIAGONAL_SPEED_RUN = False
+
+# When to stop exploring: "goal" (as soon as the goal is reached) or "optimal" (once the shortest route is proven)
+EXPLORATION = "goal"
+
+# Messages below this level are dropped (see Trace.py); Trace.DEBUG shows every sensor read, turn and move
+LOG_LEVEL = Trace.INFO
+# JSON lines file to write the log to instead of stderr, or None
+TRACE_FILE = None
+
+# Time every phase and API command and report at exit (to stderr, or as JSON to INSTRUMENT_FILE)
+INSTRUMENT = False
+INSTRUMENT_FILE = None
+
+# Replay log (see Replay.py) to record the run's commands and replies to, or None
+RECORD_FILE = None
+
+# How the run is drawn (see Display.py): "live", "throttled" (at most DRAW_RATE updates per second) or "end"
+DRAW_MODE = "live"
+DRAW_RATE = 30
+
+# Binary file the learned map is loaded from at the start of a run and saved to at the end, or None
+MAP_FILE = None
+
+# Order in which determine_next_move() breaks ties between equally close neighbours: up, left, right, down
+MOVE_PREFERENCE = (0, 3, 1, 2)
+
+# Methods timed by Instrumentation: method name: phase
+PHASES = {
+    "fetch_sensor_data": "sensing",
+    "update_wall_info": "map update",
+    "flood_fill": "planning",
+    "repair_flood_fill": "planning",
+    "unproven_cells": "planning",
+    "plan_path": "planning",
+    "determine_next_move": "planning",
+    "rotate_robot": "actuation",
+    "advance_robot": "actuation",
+}
+
+
+class FloodfillSolver:
+    def __init__(self, api, backend=None, speed_run=None, log=None, instrumentation=None, display=None, map_file=None,
+                 exploration=None, diagonal=None):
+        self.api = api
+        self.exploration = EXPLORATION if exploration is None else exploration
+        self.map_file = MAP_FILE if map_file is None else map_file
+        self.display = Display(api, DRAW_MODE, DRAW_RATE) if display is None else display
+        if instrumentation is not None:
+            instrumentation.attach(api)
+            instrumentation.instrument(self, PHASES)
+        self.log = Trace.Logger("FloodfillAlgorithm", LOG_LEVEL, TRACE_FILE) if log is None else log
+        self.backend = FLOOD_FILL_BACKEND if backend is None else backend
+        self.speed_run_enabled = SPEED_RUN if speed_run is None else speed_run
+        self.diagonal = DIAGONAL_SPEED_RUN if diagonal is None else diagonal
+        # Maze size and map, set by prepare_map() (or take_over()) on first use
+        self.max_x = self.max_y = None
+        self.maze_map = None
+        self.start_cell = self.current_cell = None
+        # Cells the robot has stood in; all four of their walls are known
+        self.visited_cells = set()
+        # Cells whose four walls are known from a saved map, until a sensor reading contradicts it
+        self.loaded_cells = None
+        # While exploring for the shortest route: the fills kept by unproven_cells(), the unvisited cells on their
+        # shortest routes, and the cells next to the walls found since the fills were last repaired
+        self.route_bounds = None
+        self.route_cells = set()
+        self.new_wall_cells = []
+
+        # Check if there is a wall in a specific direction
+        self.is_wall_left = False
+        self.is_wall_right = False
+        self.is_wall_front = False
+
+        # Robout directions:
+        # Let: Up = 0, Right = 1, Down = 2, Left = 3
+        self.next_direction = 1
+        self.current_direction = 0
+
+    def use_map(self, maze_map):
+        self.maze_map = maze_map
+        self.max_x, self.max_y = maze_map.cols, maze_map.rows
+        # Starting at the bottom-left corner
+        self.start_cell = maze_map.cell(0, 0)
+
+    def prepare_map(self):
+        '''Fetch the maze size and allocate the map on first use; resets and later runs keep both'''
+        if self.maze_map is not None:
+            return
+        width, height = self.api.mazeSize()
+        # One row per y and one column per x
+        self.use_map(MazeMap(height, width))
+        self.current_cell = self.start_cell
+        self.visited_cells = {self.current_cell}
+
+    def center_goals(self):
+        '''Return the goal cells at the center of the maze'''
+        rows = sorted({(self.max_y - 1) // 2, self.max_y // 2})
+        cols = sorted({(self.max_x - 1) // 2, self.max_x // 2})
+        return [self.maze_map.index(row, col) for row in rows for col in cols]
+
+    def flood_fill(self, goal_cells):
+        '''Apply Flood Fill Algorithm (breadth-first, starting from every goal cell at once)'''
+        if self.backend == "wavefront":
+            self.maze_map.wavefront(goal_cells)
+        else:
+            self.maze_map.flood(goal_cells)
+
+    def repair_flood_fill(self, changed_cells):
+        '''Repair flood-fill distances after new walls were found next to changed_cells'''
+        maze_map = self.maze_map
+        if self.backend == "wavefront":
+            if changed_cells:
+                maze_map.wavefront(maze_map.seeds, maze_map.seed_distance)
+        else:
+            maze_map.repair(changed_cells)
+
+    def fetch_sensor_data(self):
+        '''Collecting sensor data'''
+        self.is_wall_left, self.is_wall_front, self.is_wall_right = self.api.checkWalls(
+            ["wallLeft", "wallFront", "wallRight"])
+        if self.log.debug_enabled:
+            self.log.debug("Sensor Data - Left: {left}, Front: {front}, Right: {right}",
+                           left=self.is_wall_left, front=self.is_wall_front, right=self.is_wall_right)
+
+    def update_wall_info(self):
+        '''Update wall information in maze_map and return the cells next to new walls'''
+        maze_map = self.maze_map
+        cell = self.current_cell
+        absolute = ABSOLUTE[self.current_direction]
+        x, y = maze_map.cell_xy[cell]
+        changed_cells = []
+        for side, is_wall in ((LEFT, self.is_wall_left), (RIGHT, self.is_wall_right), (FRONT, self.is_wall_front)):
+            if not is_wall:
+                continue
+            direction = absolute[side]
+            # The border walls are in the map from the start, so add_wall() only returns cells for a new wall
+            cells = maze_map.add_wall(cell, direction)
+            if cells:
+                changed_cells.extend(cells)
+                self.display.set_wall(x, y, WALL_CHARS[direction])
+        return changed_cells
+
+    def determine_next_move(self):
+        '''Determine the best direction for the robot'''
+        maze_map = self.maze_map
+        # Walls and the maze border rank below every reachable or unreachable cell
+        blocked = UNREACHABLE + 1
+        i = self.current_cell
+        neighbours = [blocked if maze_map.walls[i] & bit else maze_map.distances[i + offset]
+                      for bit, offset in zip(WALL_BITS, maze_map.offsets)]
+
+        # Lowest distance wins; ties go to the first direction in MOVE_PREFERENCE
+        self.next_direction = min(MOVE_PREFERENCE, key=neighbours.__getitem__)
+
+    def rotate_robot(self):
+        '''Rotate the robot in the specified direction'''
+        for turn in TURNS[self.current_direction][self.next_direction]:
+            if turn == 1:
+                self.api.turnRight()
+            else:
+                self.api.turnLeft()
+        self.current_direction = self.next_direction
+        if self.log.debug_enabled:
+            self.log.debug("Rotating to {direction}", direction=self.current_direction)
+
+    def advance_robot(self):
+        '''Move the robot forward and update its position'''
+        if self.is_wall_front:
+            return
+        self.current_cell += self.maze_map.offsets[self.current_direction]
+        self.api.moveForward()
+        self.visited_cells.add(self.current_cell)
+        x, y = self.maze_map.cell_xy[self.current_cell]
+        self.display.set_color(x, y, 'B')
+        if self.log.debug_enabled:
+            self.log.debug("Moved to ({x}, {y})", x=x, y=y)
+
+    def load_map(self):
+        '''Start from the walls saved by an earlier run, and draw them'''
+        if not self.map_file or not os.path.exists(self.map_file):
+            return
+        try:
+            maze_map, known_cells = MazeMap.load(self.map_file)
+        except (OSError, ValueError) as error:
+            self.log.warning("Could not load the saved map: {error}", error=error)
+            return
+        if (maze_map.cols, maze_map.rows) != (self.max_x, self.max_y):
+            self.log.warning("The saved map is {width}x{height}, not the size of this maze", width=maze_map.cols,
+                             height=maze_map.rows)
+            return
+        self.maze_map = maze_map
+        self.loaded_cells = known_cells
+        # Draw the east and south walls of every cell, except the ones on the border
+        for i, (x, y) in enumerate(maze_map.cell_xy):
+            if x < self.max_x - 1 and maze_map.has_wall(i, 1):
+                self.display.set_wall(x, y, 'e')
+            if y > 0 and maze_map.has_wall(i, 2):
+                self.display.set_wall(x, y, 's')
+        self.log.info("Loaded the saved map ({cells} known cells)", cells=len(known_cells))
+
+    def save_map(self):
+        # run() saves even when it fails; there is nothing to save if it failed before the map was made
+        if self.map_file and self.maze_map is not None:
+            self.maze_map.save(self.map_file, self.visited_cells | (self.loaded_cells or set()))
+
+    def map_is_stale(self):
+        '''Check the sensor readings in the current cell against the loaded map'''
+        i = self.current_cell
+        walls = self.maze_map.walls[i]
+        fully_known = i in self.loaded_cells
+        side_bits = SIDE_BITS[self.current_direction]
+        for side, is_wall in ((LEFT, self.is_wall_left), (FRONT, self.is_wall_front), (RIGHT, self.is_wall_right)):
+            known = bool(walls & side_bits[side])
+            if known != is_wall and (known or fully_known):
+                return True
+        return False
+
+    def forget_map(self):
+        '''Drop a loaded map that does not match the maze, with everything learned on top of it'''
+        self.log.warning("The saved map does not match this maze, starting from an empty map")
+        self.display.clear_walls()
+        self.maze_map = MazeMap(self.max_y, self.max_x)
+        self.visited_cells = {self.current_cell}
+        self.loaded_cells = None
+
+    def navigate_to(self, target_cells):
+        '''Explore towards the nearest target cell; return False if none can be reached'''
+        # Flood fill once, then only repair the distances each new wall affects
+        self.flood_fill(target_cells)
+        while self.current_cell not in target_cells:
+            self.fetch_sensor_data()
+            if self.loaded_cells is not None and self.map_is_stale():
+                self.forget_map()
+                self.flood_fill(target_cells)
+            self.repair_flood_fill(self.update_wall_info())
+            if self.maze_map.distances[self.current_cell] == UNREACHABLE:
+                x, y = self.maze_map.cell_xy[self.current_cell]
+                self.log.warning("No path to the target from ({x}, {y})", x=x, y=y)
+                return False
+            self.determine_next_move()
+            self.rotate_robot()
+            self.advance_robot()
+        return True
+
+    def unproven_cells(self, goal_cells):
+        '''Return the unvisited cells that could still lie on a shorter route from the start to the goal
+
+        Distances on the map as it is, with unknown walls treated as open, are a lower bound on the real ones.
+        A route through visited cells only, whose walls are all known, is a real route. When one of them is as
+        short as the bound, the known route is proven to be the shortest, and no cell needs exploring.
+        The optimistic fills to the goal and from the start are made once, then only repaired around new walls,
+        and the cells on their shortest routes are only searched for again after new walls were found.
+        '''
+        maze_map = self.maze_map
+        start = self.start_cell
+        walls_changed = True
+        if self.route_bounds is None or self.route_bounds[0].walls is not maze_map.walls:
+            # First call, or a stale saved map was dropped
+            to_goal, from_start = maze_map.layer(), maze_map.layer()
+            to_goal.flood(goal_cells)
+            from_start.flood([start])
+            self.route_bounds = (to_goal, from_start)
         else:
-            API.turnRight()
-            current_direction = (current_direction + 1) % 4
-    log_message("Rotating from {} to {}\n".format(current_direction, next_direction))
-
-
-def advance_robot():
-    '''Move the robot forward and update its position'''
-    global current_row, current_col
-    if is_wall_front:
-        return
-    if current_direction == 0:  # Up
-        current_row -= 1
-    elif current_direction == 1:  # Right
-        current_col += 1
-    elif current_direction == 2:  # Down
-        current_row += 1
-    elif current_direction == 3:  # Left
-        current_col -= 1
-    API.moveForward()
-    API.setColor(current_col, MAX_X - current_row - 1, 'B')
-    log_message("Moved to ({}, {})\n".format(current_row, current_col))
+            to_goal, from_start = self.route_bounds
+            if self.new_wall_cells:
+                to_goal.repair(self.new_wall_cells)
+                from_start.repair(self.new_wall_cells)
+            else:
+                walls_changed = False
+        self.new_wall_cells = []
+        to_goal, from_start = to_goal.distances, from_start.distances
+        shortest = to_goal[start]
+        if shortest == UNREACHABLE:
+            return []
+        # A visited route as short as the bound can only step along optimistic shortest routes, one closer to the
+        # goal each time, so the search stays among the few visited cells on them
+        visited_cells = self.visited_cells
+        stack = [start]
+        reached = {start}
+        while stack:
+            i = stack.pop()
+            if to_goal[i] == 0:
+                return []
+            for j in maze_map.open_neighbours(i):
+                if (to_goal[j] == to_goal[i] - 1 and from_start[j] == from_start[i] + 1 and j in visited_cells
+                        and j not in reached):
+                    reached.add(j)
+                    stack.append(j)
+        if not walls_changed:
+            self.route_cells -= visited_cells
+            return self.route_cells
+        # A cell is on some shortest optimistic route if its distances from the start and to the goal add up
+        self.route_cells = {i for i in range(maze_map.size)
+                            if from_start[i] + to_goal[i] == shortest and i not in visited_cells}
+        return self.route_cells
+
+    def plan_path(self, target_cells):
+        '''Return the directions to the nearest target cell, last step first, or None if none can be reached'''
+        route = self.maze_map.path(self.current_cell, target_cells, MOVE_PREFERENCE)
+        if route is not None:
+            route.reverse()
+        return route
+
+    def visit_nearest(self, target_cells):
+        '''Explore towards the nearest target cell along a shortest path; return False if none can be reached'''
+        route = None
+        while self.current_cell not in target_cells:
+            self.fetch_sensor_data()
+            if self.loaded_cells is not None and self.map_is_stale():
+                self.forget_map()
+                route = None
+            self.new_wall_cells.extend(self.update_wall_info())
+            # New walls only make paths longer, so the route stays a shortest one until a wall blocks its next step
+            if route is None or self.maze_map.has_wall(self.current_cell, route[-1]):
+                route = self.plan_path(target_cells)
+                if route is None:
+                    x, y = self.maze_map.cell_xy[self.current_cell]
+                    self.log.warning("No path to the target from ({x}, {y})", x=x, y=y)
+                    return False
+            self.next_direction = route[-1]
+            self.rotate_robot()
+            # advance_robot() stays put after turning away from a wall that was in front, then the step is retried
+            cell = self.current_cell
+            self.advance_robot()
+            if self.current_cell != cell:
+                route.pop()
+        return True
+
+    def explore_until_optimal(self, goal_cells):
+        '''Explore the cells that could still shorten the route until the shortest route is proven'''
+        try:
+            while True:
+                candidates = self.unproven_cells(goal_cells)
+                if not candidates:
+                    self.log.info("Shortest route proven after visiting {cells} cells",
+                                  cells=len(self.visited_cells))
+                    return True
+                if self.log.debug_enabled:
+                    self.log.debug("{count} cells could still shorten the route", count=len(candidates))
+                if not self.visit_nearest(candidates):
+                    return False
+        finally:
+            self.route_bounds = None
+
+    def take_over(self, cell, direction, known_map, target_cells):
+        '''Continue another solver's run from its pose, with the walls it has already seen'''
+        self.use_map(known_map)
+        self.current_cell, self.current_direction = cell, direction
+        self.visited_cells = {cell}
+        return self.navigate_to(target_cells)
+
+    def speed_run(self, goal_cells):
+        '''Drive the fastest route to the goal over the visited cells, one command per straight'''
+        if self.diagonal:
+            return self.diagonal_speed_run(goal_cells)
+        maze_map = self.maze_map
+        actions = SpeedRun.plan_route(maze_map, self.current_cell, self.current_direction, goal_cells,
+                                      self.visited_cells)
+        if actions is None:
+            self.log.warning("No known route to the goal")
+            return False
+        for action, amount in actions:
+            if action == "turn":
+                if amount == 1:
+                    self.api.turnRight()
+                else:
+                    self.api.turnLeft()
+                self.current_direction = (self.current_direction + amount) % 4
+                continue
+            self.api.moveForward(amount)
+            offset = maze_map.offsets[self.current_direction]
+            for _ in range(amount):
+                self.current_cell += offset
+                self.display.set_color(*maze_map.cell_xy[self.current_cell], 'Y')
+        self.log.info("Speed run: {commands} commands", commands=len(actions))
+        return True
+
+    def diagonal_speed_run(self, goal_cells):
+        '''Drive the fastest route to the goal over the visited cells, cutting corners diagonally'''
+        maze_map = self.maze_map
+        actions = SpeedRun.plan_diagonal_route(maze_map, self.current_cell, self.current_direction, goal_cells,
+                                               self.visited_cells)
+        if actions is None:
+            self.log.warning("No known route to the goal")
+            return False
+        cell = self.current_cell
+        point, eighth = SpeedRun.half_point(maze_map, cell), 2 * self.current_direction
+        for action, amount in actions:
+            if action == "turn":
+                if amount == 1:
+                    self.api.turnRight()
+                else:
+                    self.api.turnLeft()
+                eighth = (eighth + 2 * amount) % 8
+            elif action == "turn45":
+                if amount == 1:
+                    self.api.turnRight45()
+                else:
+                    self.api.turnLeft45()
+                eighth = (eighth + amount) % 8
+            else:
+                self.api.moveForwardHalf(amount)
+                cells, point = SpeedRun.half_steps(maze_map, point, eighth, amount)
+                for cell in cells:
+                    self.display.set_color(*maze_map.cell_xy[cell], 'Y')
+        # The route ends on a goal cell center, which is only reached along one of the four headings; the route is
+        # empty when the start is a goal already
+        self.current_cell = cell
+        self.current_direction = eighth // 2
+        self.log.info("Speed run: {commands} commands", commands=len(actions))
+        return True
+
+    def run(self):
+        try:
+            self.prepare_map()
+            self.load_map()
+            while True:
+                try:
+                    self.solve()
+                    return
+                except API.MouseResetError:
+                    self.restart()
+        finally:
+            self.display.flush()
+            self.save_map()
+
+    def restart(self):
+        '''The simulator was reset: carry on from the start cell, keeping the map learned so far'''
+        self.log.info("Simulator reset, starting again with the map learned so far")
+        self.api.ackReset()
+        self.current_cell = self.start_cell
+        self.current_direction = 0
+
+    def solve(self):
+        self.log.info("Running...")
+        start_time = time.time()
+
+        # Setting the starting point and target point
+        self.display.set_color(0, 0, 'R')
+        self.display.set_text(0, 0, "Start")
+        goal_positions = self.center_goals()
+        for cell in goal_positions:
+            x, y = self.maze_map.cell_xy[cell]
+            self.display.set_color(x, y, 'G')
+            self.display.set_text(x, y, "Goal")
+
+        if not self.navigate_to(goal_positions):
+            return
+
+        end_time = time.time()
+        completion_time = end_time - start_time
+        x, y = self.maze_map.cell_xy[self.current_cell]
+        self.log.info("Goal reached at ({x}, {y})!", x=x, y=y)
+        self.log.info("Elapsed time: {seconds:.2f} seconds", seconds=completion_time)
+
+        if self.exploration == "optimal" and not self.explore_until_optimal(goal_positions):
+            return
+        if not self.speed_run_enabled or not self.navigate_to([self.start_cell]):
+            return
+        self.log.info("Back at the start")
+        start_time = time.time()
+        if self.speed_run(goal_positions):
+            self.log.info("Speed run time: {seconds:.2f} seconds", seconds=time.time() - start_time)
 
 
 def main():
-    log_message("Running...")
-    start_time = time.time()
-    initialize_flood_fill_path()
-
-    # Setting the starting point and target point
-    API.setColor(0, 0, 'R')
-    API.setText(0, 0, "Start")
-    goal_positions = [((MAX_X//2), (MAX_Y//2)), ((MAX_X//2), (MAX_Y//2)-1), ((MAX_X//2)-1, (MAX_Y//2)), ((MAX_X//2)-1, (MAX_Y//2)-1)]
-    for x, y in goal_positions:
-        API.setColor(x, y, 'G')
-        API.setText(x, y, "Goal")
-
-    # Flood fill and navigate
-    while (current_row, current_col) not in goal_positions:
-        initialize_flood_fill_path()
-        fetch_sensor_data()
-        update_wall_info()
-        flood_fill(7, 7, 0)
-        determine_next_move()
-        rotate_robot()
-        advance_robot()
-    
-    end_time = time.time()
-    completion_time = end_time - start_time
-    log_message("Goal reached at ({}, {})!\n".format(current_row, current_col))
-    log_message("Elapsed time: {:.2f} seconds\n".format(completion_time))
+    instrumentation = None
+    if INSTRUMENT:
+        instrumentation = Instrumentation()
+        instrumentation.report_at_exit(INSTRUMENT_FILE)
+    if RECORD_FILE:
+        # Replay.py brings in the benchmark tools, so it is only imported when a run is recorded
+        import Replay
+        API.setTransport(Replay.Recorder(API.session.transport, RECORD_FILE, {"solver": "FloodfillAlgorithm"}))
+    FloodfillSolver(API.session, instrumentation=instrumentation).run()
 
 
 if __name__ == "__main__":
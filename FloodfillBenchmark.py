@@ -0,0 +1,131 @@
+########################################################################################################################################
+                                                     # Flood Fill Benchmark File #
+
+"""
+This script times the flood-fill distance engines against each other on the same maps and checks that they agree.
+
+1. Engines:
+   - `recursive`: the original recursive flood fill over nested lists, kept here as the reference.
+   - `bfs`: `MazeMap.flood()`, the iterative breadth-first search used by FloodfillAlgorithm.py.
+   - `wavefront`: `MazeMap.wavefront()`, the NumPy whole-frontier version (skipped when NumPy is not installed).
+
+2. Maps:
+   - The complete wall layout of every maze file given on the command line (`.num` or `.map`), or
+   - random wall maps of 16x16, 32x32 and 64x64 cells when no file is given.
+   - Every engine floods from the cell just above and left of the center, as `flood_fill(7, 7, 0)` does on 16x16.
+
+3. Output:
+   - One line per map and engine with the mean time per fill and whether the distances match the recursive engine:
+         python FloodfillBenchmark.py [maze files...] [--repeat N]
+"""
+
+########################################################################################################################################
+
+import argparse
+import random
+import sys
+import time
+
+import HeadlessSimulator
+import MazeMap
+
+
+def recursive_flood_fill(wall_info, flood_fill_path, row, col, distance):
+    '''The original FloodfillAlgorithm.flood_fill, on nested lists of east (0b0100) and south (0b0010) wall bits'''
+    rows, cols = len(wall_info), len(wall_info[0])
+    if row < 0 or row >= rows or col < 0 or col >= cols:
+        return
+    if flood_fill_path[row][col] <= distance and flood_fill_path[row][col] != -1:
+        return
+    flood_fill_path[row][col] = distance
+
+    if col < cols - 1 and not (wall_info[row][col] & 0b0100):
+        recursive_flood_fill(wall_info, flood_fill_path, row, col + 1, distance + 1)
+    if col > 0 and not (wall_info[row][col - 1] & 0b0100):
+        recursive_flood_fill(wall_info, flood_fill_path, row, col - 1, distance + 1)
+    if row < rows - 1 and not (wall_info[row][col] & 0b0010):
+        recursive_flood_fill(wall_info, flood_fill_path, row + 1, col, distance + 1)
+    if row > 0 and not (wall_info[row - 1][col] & 0b0010):
+        recursive_flood_fill(wall_info, flood_fill_path, row - 1, col, distance + 1)
+
+
+def maze_map_from_maze(maze):
+    '''Copy every wall of a HeadlessSimulator maze into a MazeMap (row 0 is the top row).'''
+    maze_map = MazeMap.MazeMap(maze.height, maze.width)
+    for x in range(maze.width):
+        for y in range(maze.height):
+            for direction in range(4):
+                if maze.has_wall(x, y, direction):
+                    maze_map.add_wall(maze_map.cell(x, y), direction)
+    return maze_map
+
+
+def random_maze_map(size, wall_density=0.35, seed=0):
+    generator = random.Random(seed)
+    maze_map = MazeMap.MazeMap(size, size)
+    for row in range(size):
+        for col in range(size):
+            for direction in (1, 2):
+                if generator.random() < wall_density:
+                    maze_map.add_wall(maze_map.index(row, col), direction)
+    return maze_map
+
+
+def run_recursive(maze_map, seed):
+    bits = MazeMap.WALL_BITS[1] | MazeMap.WALL_BITS[2]
+    wall_info = [[maze_map.walls[maze_map.index(row, col)] & bits for col in range(maze_map.cols)]
+                 for row in range(maze_map.rows)]
+    flood_fill_path = [[-1 for _ in range(maze_map.cols)] for _ in range(maze_map.rows)]
+    recursive_flood_fill(wall_info, flood_fill_path, seed[0], seed[1], 0)
+    return [MazeMap.UNREACHABLE if distance == -1 else distance for row in flood_fill_path for distance in row]
+
+
+def run_bfs(maze_map, seed):
+    maze_map.flood([maze_map.index(*seed)])
+    return maze_map.distances.tolist()
+
+
+def run_wavefront(maze_map, seed):
+    maze_map.wavefront([maze_map.index(*seed)])
+    return maze_map.distances.tolist()
+
+
+def time_engine(engine, maze_map, seed, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        distances = engine(maze_map, seed)
+    return (time.perf_counter() - start) / repeat, distances
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the flood-fill distance engines.")
+    parser.add_argument("mazes", nargs="*", help="maze files in .num or .map format")
+    parser.add_argument("--repeat", type=int, default=20, help="fills per engine and map")
+    args = parser.parse_args()
+
+    if args.mazes:
+        maps = [(path, maze_map_from_maze(HeadlessSimulator.load_maze(path))) for path in args.mazes]
+    else:
+        maps = [("random {0}x{0}".format(size), random_maze_map(size)) for size in (16, 32, 64)]
+
+    engines = [("recursive", run_recursive), ("bfs", run_bfs)]
+    if MazeMap.has_numpy():
+        # Import NumPy now, so the first wavefront timing does not include it
+        MazeMap.require_numpy()
+        engines.append(("wavefront", run_wavefront))
+    # The recursive engine can go one level deeper per cell
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 4 * max(maze_map.size for _, maze_map in maps)))
+
+    for name, maze_map in maps:
+        seed = (maze_map.rows // 2 - 1, maze_map.cols // 2 - 1)
+        reference = None
+        for engine_name, engine in engines:
+            seconds, distances = time_engine(engine, maze_map, seed, args.repeat)
+            if reference is None:
+                reference = distances
+            print("{:<24} {:<10} {:9.3f} ms  {}".format(
+                name, engine_name, seconds * 1000, "ok" if distances == reference else "MISMATCH"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+########################################################################################################################################
+                                                            # Heading File #
+
+"""
+This script holds the geometry every module shares: headings, sides and the moves between them, as lookup tables
+computed once at import, so the solvers' per-step code is table lookups instead of if/elif chains on the heading.
+
+1. Headings:
+   - Absolute headings are North/Up = 0, East/Right = 1, South/Down = 2, West/Left = 3, in every module.
+   - `DELTA_X` and `DELTA_Y` step a position in simulator coordinates (`(0, 0)` bottom-left, north is `y + 1`);
+     `DELTA_ROW` and `DELTA_COL` step a `MazeMap` cell (row 0 at the top, so north is `row - 1`).
+   - `WALL_BITS` are the `MazeMap` wall bits and `WALL_CHARS` the names `API.setWall()` takes.
+   - `OPPOSITE[heading]` is the heading that faces back.
+
+2. Sides:
+   - Sides are relative to the mouse: `FRONT` = 0, `RIGHT` = 1, `BACK` = 2, `LEFT` = 3.
+   - `ABSOLUTE[heading][side]` is the absolute direction of a side, and `SIDE_BITS[heading][side]` its wall bit.
+   - `SIDE_COMMANDS[side]` is the API wall check for a side, and `SIDE_OF_COMMAND` the reverse.
+
+3. Turns:
+   - `TURNS[from_heading][to_heading]` is the shortest list of quarter turns between two headings: `1` for
+     `turnRight()`, `-1` for `turnLeft()`; turning around is two right turns.
+
+4. Eighths:
+   - Half steps and 45 degree turns need eight headings, counted in eighths of a turn: North = 0, North-East = 1,
+     East = 2 and so on, so heading `h` is eighth `2 * h`. `EIGHTH_NAMES` names them.
+   - `HALF_DELTA_X` and `HALF_DELTA_Y` step a position measured in half cells (simulator axes) one half step along an
+     eighth, `HALF_DELTA_ROW` and `HALF_DELTA_COL` do the same with row 0 at the top.
+"""
+
+########################################################################################################################################
+
+FRONT, RIGHT, BACK, LEFT = 0, 1, 2, 3
+
+DELTA_X = (0, 1, 0, -1)
+DELTA_Y = (1, 0, -1, 0)
+DELTA_ROW = (-1, 0, 1, 0)
+DELTA_COL = (0, 1, 0, -1)
+
+WALL_BITS = (0b1000, 0b0100, 0b0010, 0b0001)
+WALL_CHARS = "nesw"
+OPPOSITE = (2, 3, 0, 1)
+
+ABSOLUTE = tuple(tuple((heading + side) % 4 for side in range(4)) for heading in range(4))
+SIDE_BITS = tuple(tuple(WALL_BITS[direction] for direction in row) for row in ABSOLUTE)
+
+SIDE_COMMANDS = ("wallFront", "wallRight", "wallBack", "wallLeft")
+SIDE_OF_COMMAND = {command: side for side, command in enumerate(SIDE_COMMANDS)}
+
+# Quarter turns for each change of heading, indexed by (to - from) % 4
+TURNS_BY_CHANGE = ((), (1,), (1, 1), (-1,))
+TURNS = tuple(tuple(TURNS_BY_CHANGE[(to_heading - from_heading) % 4] for to_heading in range(4))
+              for from_heading in range(4))
+
+EIGHTH_NAMES = ("n", "ne", "e", "se", "s", "sw", "w", "nw")
+HALF_DELTA_X = (0, 1, 1, 1, 0, -1, -1, -1)
+HALF_DELTA_Y = (1, 1, 0, -1, -1, -1, 0, 1)
+HALF_DELTA_ROW = tuple(-delta for delta in HALF_DELTA_Y)
+HALF_DELTA_COL = HALF_DELTA_X
@@ -0,0 +1,429 @@
+########################################################################################################################################
+                                                       # Headless Simulator File #
+
+"""
+This script provides an offline, headless stand-in for the mms maze simulator. It speaks the same line protocol as
+`API.command`, so the solvers can run in CI, in batch jobs and in benchmarks without the GUI and its animation delays.
+
+1. Maze Files:
+   - `load_maze()` reads the text formats used by mms:
+     - `.num`: one line per cell, `x y north east south west`, where each wall flag is `0` or `1`.
+     - `.map`: ASCII art made of posts (`+` or `o`), horizontal walls (`-`) and vertical walls (`|`).
+   - Mazes use simulator coordinates: `(0, 0)` is the bottom-left cell and north is `y + 1`.
+   - `save_maze()` writes a `Maze` back in either format (MazeGenerator.py uses it).
+
+2. Simulator:
+   - `HeadlessSimulator` keeps the true walls, the mouse pose and everything the solver drew (colors, text, walls).
+   - It answers `mazeWidth`, `mazeHeight`, `wallFront`, `wallBack`, `wallLeft`, `wallRight`, `moveForward`,
+     `moveForwardHalf`, `turnLeft`, `turnRight`, `turnLeft45`, `turnRight45`, `wasReset` and `ackReset` with the same
+     replies as the real simulator (`true`/`false`, `ack`, `crash`), and silently records `setWall`, `setColor`,
+     `setText` and their `clear` forms.
+   - The mouse pose is kept in half cells (`half_x`, `half_y`, odd at a cell center) with one of eight headings
+     (`eighth`, see Heading.py); `x`, `y` and `direction` give the cell and the four-way heading. A half step can end
+     on a cell center or on the middle of a cell edge, and crashes on a wall, a post or the border. Diagonal half
+     steps run from edge middle to edge middle, through the corner of a cell, so a diagonal move from a cell center
+     hits a post.
+   - Wall checks are answered at a cell center facing one of the four headings.
+   - `request_reset()` plays the part of the GUI reset button.
+   - It counts `commands`, `round_trips` (writes that needed a reply), `cells_moved` (half steps / 2), `distance`
+     (path length in cells, a diagonal half step being `DIAGONAL_HALF_STEP`) and `turns` (90 and 45 degree turns alike)
+     for benchmarks, and raises `MoveLimitExceeded` once the mouse has moved `move_limit` cells, so a solver stuck in
+     a loop cannot hang a batch run.
+
+3. Transports:
+   - In process: `HeadlessSimulator` has the `write()`, `flush()` and `readline()` methods `API.command` uses,
+     so `API.Session(HeadlessSimulator(load_maze(path)))` can be handed to a solver class such as
+     `FloodfillSolver` in place of the stdio link.
+   - As a child process: `run_solver()` starts a solver script with its stdin/stdout connected to the simulator,
+     exactly as the GUI does. This is also the command line entry point:
+         python HeadlessSimulator.py maze.num FloodfillAlgorithm.py
+   - As the simulator process: `serve()` answers commands read from a stream, so a controller can start the
+     simulator and drive it (AsyncTransport.py does, for many robots at once), over stdin/stdout or a local socket:
+         python HeadlessSimulator.py maze.num [--port PORT]
+
+4. Limitations:
+   - The diagonal wall checks (`wallFrontLeft` and so on) and wall checks away from a cell center are not modeled.
+"""
+
+########################################################################################################################################
+
+import argparse
+import math
+import socket
+import subprocess
+import sys
+from collections import deque
+
+from Heading import ABSOLUTE, DELTA_X, DELTA_Y, EIGHTH_NAMES, HALF_DELTA_X, HALF_DELTA_Y, OPPOSITE, SIDE_OF_COMMAND
+
+# Length in cells of a half step along a diagonal, from the middle of one cell edge to the middle of the next
+DIAGONAL_HALF_STEP = math.sqrt(2) / 2
+
+
+class UnsupportedCommandError(Exception):
+    pass
+
+
+class MoveLimitExceeded(Exception):
+    pass
+
+
+class Maze:
+    '''True wall layout of a maze, stored as one bit per direction for every cell.'''
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.walls = [[0 for _ in range(height)] for _ in range(width)]
+        for x in range(width):
+            self.set_wall(x, 0, 2)
+            self.set_wall(x, height - 1, 0)
+        for y in range(height):
+            self.set_wall(0, y, 3)
+            self.set_wall(width - 1, y, 1)
+
+    def in_bounds(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def has_wall(self, x, y, direction):
+        if not self.in_bounds(x, y):
+            return True
+        return bool(self.walls[x][y] & (1 << direction))
+
+    def set_wall(self, x, y, direction):
+        '''Add a wall on one side of a cell, and on the matching side of its neighbour.'''
+        self.walls[x][y] |= 1 << direction
+        next_x, next_y = x + DELTA_X[direction], y + DELTA_Y[direction]
+        if self.in_bounds(next_x, next_y):
+            self.walls[next_x][next_y] |= 1 << OPPOSITE[direction]
+
+    def clear_wall(self, x, y, direction):
+        '''Remove a wall between two cells of the maze (the border cannot be removed).'''
+        next_x, next_y = x + DELTA_X[direction], y + DELTA_Y[direction]
+        if self.in_bounds(next_x, next_y):
+            self.walls[x][y] &= ~(1 << direction)
+            self.walls[next_x][next_y] &= ~(1 << OPPOSITE[direction])
+
+
+def parse_num(lines):
+    '''Build a Maze from the lines of a .num file (`x y north east south west`).'''
+    cells = []
+    for line in lines:
+        fields = line.split()
+        if fields:
+            cells.append([int(field) for field in fields[:6]])
+    maze = Maze(max(cell[0] for cell in cells) + 1, max(cell[1] for cell in cells) + 1)
+    for x, y, *flags in cells:
+        for direction, flag in enumerate(flags):
+            if flag:
+                maze.set_wall(x, y, direction)
+    return maze
+
+
+def parse_map(lines):
+    '''Build a Maze from the lines of a .map file (posts, `-` and `|` walls).'''
+    lines = [line.rstrip("\r\n") for line in lines if line.strip()]
+    post = lines[0][0]
+    posts = [i for i, char in enumerate(lines[0]) if char == post]
+    width, height = len(posts) - 1, (len(lines) - 1) // 2
+
+    def char_at(row, col):
+        line = lines[row]
+        return line[col] if col < len(line) else " "
+
+    maze = Maze(width, height)
+    for row in range(height):
+        y = height - 1 - row
+        for x in range(width):
+            if char_at(2 * row, posts[x] + 1) != " ":
+                maze.set_wall(x, y, 0)
+            if char_at(2 * row + 1, posts[x]) != " ":
+                maze.set_wall(x, y, 3)
+    return maze
+
+
+def load_maze(path):
+    '''Load a .num or .map maze file.'''
+    with open(path) as maze_file:
+        lines = maze_file.readlines()
+    if path.endswith(".num"):
+        return parse_num(lines)
+    return parse_map(lines)
+
+
+def format_num(maze):
+    '''Return the lines of a .num file for a Maze.'''
+    return ["{} {} {}\n".format(x, y, " ".join("1" if maze.has_wall(x, y, direction) else "0" for direction in range(4)))
+            for x in range(maze.width) for y in range(maze.height)]
+
+
+def format_map(maze):
+    '''Return the lines of a .map file for a Maze.'''
+    lines = []
+    for y in reversed(range(maze.height)):
+        lines.append("+" + "".join(("---" if maze.has_wall(x, y, 0) else "   ") + "+" for x in range(maze.width)) + "\n")
+        lines.append("".join(("|" if maze.has_wall(x, y, 3) else " ") + "   " for x in range(maze.width)) + "|\n")
+    lines.append("+" + "---+" * maze.width + "\n")
+    return lines
+
+
+def save_maze(maze, path):
+    '''Write a Maze as a .num or .map file, chosen by the file extension.'''
+    lines = format_num(maze) if path.endswith(".num") else format_map(maze)
+    with open(path, "w") as maze_file:
+        maze_file.writelines(lines)
+
+
+class HeadlessSimulator:
+    '''Answers API.py commands from an in-memory maze, with no GUI and no delays.'''
+
+    def __init__(self, maze, move_limit=None):
+        self.maze = maze
+        self.move_limit = move_limit
+        self.commands = 0
+        self.round_trips = 0
+        self.half_steps = 0
+        self.distance = 0.0
+        self.turns = 0
+        self.replies = deque()
+        self.colors = {}
+        self.texts = {}
+        self.marked_walls = set()
+        self.reset_requested = False
+        self.reset_mouse()
+
+    def reset_mouse(self):
+        self.half_x, self.half_y, self.eighth = 1, 1, 0
+        self.crashed = False
+
+    @property
+    def x(self):
+        return self.half_x // 2
+
+    @property
+    def y(self):
+        return self.half_y // 2
+
+    @property
+    def direction(self):
+        return self.eighth // 2
+
+    @property
+    def cells_moved(self):
+        return self.half_steps // 2
+
+    def request_reset(self):
+        '''Press the reset button: the mouse returns to the start once the solver calls ackReset.'''
+        self.reset_requested = True
+
+    # Transport interface used by API.command
+
+    def write(self, data):
+        waiting = len(self.replies)
+        for line in data.splitlines():
+            reply = self.execute(line)
+            if reply is not None:
+                self.replies.append(reply + "\n")
+        if len(self.replies) > waiting:
+            self.round_trips += 1
+
+    def flush(self):
+        pass
+
+    def readline(self):
+        return self.replies.popleft() if self.replies else ""
+
+    # Protocol
+
+    def execute(self, line):
+        '''Run one protocol line and return the reply, or None for commands that have no reply.'''
+        name, *args = line.split()
+        self.commands += 1
+        if name in SIDE_OF_COMMAND:
+            return self.check_wall(SIDE_OF_COMMAND[name], args)
+        handler = self.handlers.get(name)
+        if handler is None:
+            raise UnsupportedCommandError(name)
+        return handler(self, *args)
+
+    def check_wall(self, side, args):
+        if not self.half_x % 2 or not self.half_y % 2 or self.eighth % 2:
+            raise UnsupportedCommandError("wall checks away from a cell center or facing a diagonal")
+        # Walls sit on the odd half steps around a cell center, so 0 and 1 both mean this cell's edge
+        cells_ahead = int(args[0]) // 2 if args else 0
+        direction = ABSOLUTE[self.direction][side]
+        x = self.x + DELTA_X[direction] * cells_ahead
+        y = self.y + DELTA_Y[direction] * cells_ahead
+        return "true" if self.maze.has_wall(x, y, direction) else "false"
+
+    def maze_width(self):
+        return str(self.maze.width)
+
+    def maze_height(self):
+        return str(self.maze.height)
+
+    def blocked(self, half_x, half_y):
+        '''Whether the mouse cannot stand at a half cell position: outside the maze, on a post or on a wall.'''
+        maze = self.maze
+        if not (0 < half_x < 2 * maze.width and 0 < half_y < 2 * maze.height):
+            return True
+        if half_x % 2 == 0:
+            # The middle of a vertical edge (or a post, where two edges meet)
+            return half_y % 2 == 0 or maze.has_wall(half_x // 2, half_y // 2, 3)
+        if half_y % 2 == 0:
+            return maze.has_wall(half_x // 2, half_y // 2, 2)
+        return False
+
+    def move_forward_half(self, num_half_steps=1):
+        delta_x, delta_y = HALF_DELTA_X[self.eighth], HALF_DELTA_Y[self.eighth]
+        length = DIAGONAL_HALF_STEP if self.eighth % 2 else 0.5
+        for _ in range(int(num_half_steps)):
+            if self.blocked(self.half_x + delta_x, self.half_y + delta_y):
+                self.crashed = True
+                return "crash"
+            if self.move_limit is not None and self.half_steps >= 2 * self.move_limit:
+                raise MoveLimitExceeded(self.move_limit)
+            self.half_x += delta_x
+            self.half_y += delta_y
+            self.half_steps += 1
+            self.distance += length
+        return "ack"
+
+    def move_forward(self, distance=1):
+        return self.move_forward_half(2 * int(distance))
+
+    def turn(self, eighths):
+        self.eighth = (self.eighth + eighths) % 8
+        self.turns += 1
+        return "ack"
+
+    def turn_right(self):
+        return self.turn(2)
+
+    def turn_left(self):
+        return self.turn(-2)
+
+    def turn_right_45(self):
+        return self.turn(1)
+
+    def turn_left_45(self):
+        return self.turn(-1)
+
+    def set_wall(self, x, y, direction):
+        self.marked_walls.add((int(x), int(y), direction))
+
+    def clear_wall(self, x, y, direction):
+        self.marked_walls.discard((int(x), int(y), direction))
+
+    def set_color(self, x, y, color):
+        self.colors[int(x), int(y)] = color
+
+    def clear_color(self, x, y):
+        self.colors.pop((int(x), int(y)), None)
+
+    def clear_all_color(self):
+        self.colors.clear()
+
+    def set_text(self, x, y, *text):
+        self.texts[int(x), int(y)] = " ".join(text)
+
+    def clear_text(self, x, y):
+        self.texts.pop((int(x), int(y)), None)
+
+    def clear_all_text(self):
+        self.texts.clear()
+
+    def was_reset(self):
+        return "true" if self.reset_requested else "false"
+
+    def ack_reset(self):
+        self.reset_requested = False
+        self.reset_mouse()
+        return "ack"
+
+    handlers = {
+        "mazeWidth": maze_width,
+        "mazeHeight": maze_height,
+        "moveForward": move_forward,
+        "moveForwardHalf": move_forward_half,
+        "turnRight": turn_right,
+        "turnLeft": turn_left,
+        "turnRight45": turn_right_45,
+        "turnLeft45": turn_left_45,
+        "setWall": set_wall,
+        "clearWall": clear_wall,
+        "setColor": set_color,
+        "clearColor": clear_color,
+        "clearAllColor": clear_all_color,
+        "setText": set_text,
+        "clearText": clear_text,
+        "clearAllText": clear_all_text,
+        "wasReset": was_reset,
+        "ackReset": ack_reset,
+    }
+
+
+def run_solver(maze, command, stderr=None):
+    '''Run a solver in a child process connected to a HeadlessSimulator, the way the GUI runs it.'''
+    simulator = HeadlessSimulator(maze)
+    process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=stderr, text=True)
+    try:
+        for line in process.stdout:
+            reply = simulator.execute(line)
+            if reply is not None:
+                process.stdin.write(reply + "\n")
+                process.stdin.flush()
+    except Exception:
+        process.kill()
+        raise
+    finally:
+        process.stdin.close()
+        process.wait()
+    return simulator
+
+
+def serve(simulator, input_stream, output_stream):
+    '''Answer the commands read from input_stream on output_stream until the stream closes.'''
+    for line in input_stream:
+        if not line.strip():
+            continue
+        reply = simulator.execute(line)
+        if reply is not None:
+            output_stream.write(reply + "\n")
+            output_stream.flush()
+
+
+def serve_socket(simulator, port):
+    '''Accept one connection on a local TCP port and serve it.'''
+    with socket.create_server(("127.0.0.1", port)) as server:
+        sys.stderr.write("Listening on 127.0.0.1:{}\n".format(server.getsockname()[1]))
+        sys.stderr.flush()
+        connection, _ = server.accept()
+        # Replies are small and every one is waited for, so send them at once
+        connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with connection, connection.makefile("r") as input_stream, connection.makefile("w") as output_stream:
+            serve(simulator, input_stream, output_stream)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a maze solver against a maze file without the GUI.")
+    parser.add_argument("maze", help="maze file in .num or .map format")
+    parser.add_argument("solver", nargs="?",
+                        help="solver script, e.g. FloodfillAlgorithm.py; without one, serve commands instead")
+    parser.add_argument("--port", type=int, help="serve on this local TCP port (0 picks a free one) instead of stdio")
+    args = parser.parse_args()
+
+    if args.solver is None:
+        simulator = HeadlessSimulator(load_maze(args.maze))
+        if args.port is None:
+            serve(simulator, sys.stdin, sys.stdout)
+        else:
+            serve_socket(simulator, args.port)
+    else:
+        simulator = run_solver(load_maze(args.maze), [sys.executable, args.solver])
+    sys.stderr.write("Mouse finished at ({}, {}) facing {}{}\n".format(
+        simulator.x, simulator.y, EIGHTH_NAMES[simulator.eighth], " after a crash" if simulator.crashed else ""))
+
+
+if __name__ == "__main__":
+    main()
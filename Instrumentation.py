@@ -0,0 +1,142 @@
+########################################################################################################################################
+                                                        # Instrumentation File #
+
+"""
+This script measures where a solver run spends its time: in each phase of the solver loop, and in each API command.
+
+1. Phases:
+   - `instrument()` wraps the solver methods listed in the solver's `PHASES` (method name: phase) with a timer that
+     adds up their calls and wall clock time. For the flood-fill solver the phases are sensing
+     (`fetch_sensor_data`), map update (`update_wall_info`), planning (`flood_fill`, `repair_flood_fill`,
+     `determine_next_move`) and actuation (`rotate_robot`, `advance_robot`).
+   - Phase times include the API calls made inside them, so sensing and actuation time is mostly simulator I/O.
+
+2. API Commands:
+   - `attach()` wraps the `command()`, `pipeline()` and `flushCommands()` methods of an `API.Session` to count calls
+     and time per command verb (a pipeline is counted once under its verbs joined with `+`, e.g.
+     `wallLeft+wallFront+wallRight`), and the number of writes to the simulator.
+   - Commands without a reply only join the write queue, so their time is near zero; the write itself is timed with
+     the next command that waits for a reply.
+
+3. Overhead:
+   - Nothing is wrapped unless a solver is given an `Instrumentation`, so runs without it pay nothing at all.
+     The solvers create one when their `INSTRUMENT` constant is true.
+
+4. Summary:
+   - `summary()` formats the totals as a table; `report()` returns them as a dictionary.
+   - `report_at_exit()` prints the table to stderr, or writes the report as JSON to a file, when the process exits.
+"""
+
+########################################################################################################################################
+
+import atexit
+import json
+import sys
+import time
+from functools import wraps
+
+
+class Instrumentation:
+    def __init__(self):
+        self.start = time.perf_counter()
+        # Function name: [phase, calls, seconds]
+        self.functions = {}
+        # Command verb: [calls, seconds]
+        self.verbs = {}
+        self.writes = 0
+        self.reported = False
+
+    def timed(self, entry, function):
+        '''Wrap function so every call adds one to entry[-2] and its duration to entry[-1].'''
+        @wraps(function)
+        def timed_function(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                entry[-2] += 1
+                entry[-1] += time.perf_counter() - start
+        return timed_function
+
+    def verb_entry(self, verb):
+        if verb not in self.verbs:
+            self.verbs[verb] = [0, 0.0]
+        return self.verbs[verb]
+
+    def instrument(self, solver, phases):
+        '''Time the solver's methods named in phases (method name: phase name).'''
+        for name, phase in phases.items():
+            entry = self.functions.setdefault(name, [phase, 0, 0.0])
+            setattr(solver, name, self.timed(entry, getattr(solver, name)))
+
+    def attach(self, session):
+        '''Count and time every command sent through an API.Session (once per session).'''
+        if getattr(session, "instrumentation", None) is self:
+            return
+        session.instrumentation = self
+        command, pipeline, flush = session.command, session.pipeline, session.flushCommands
+
+        def timed_command(args, return_type=None):
+            entry = self.verb_entry(args[0])
+            start = time.perf_counter()
+            try:
+                return command(args, return_type)
+            finally:
+                entry[0] += 1
+                entry[1] += time.perf_counter() - start
+
+        def timed_pipeline(requests):
+            if not requests:
+                return pipeline(requests)
+            entry = self.verb_entry("+".join(args[0] for args, return_type in requests))
+            start = time.perf_counter()
+            try:
+                return pipeline(requests)
+            finally:
+                entry[0] += 1
+                entry[1] += time.perf_counter() - start
+
+        def counted_flush():
+            if session.pending:
+                self.writes += 1
+            flush()
+
+        session.command = timed_command
+        session.pipeline = timed_pipeline
+        session.flushCommands = counted_flush
+
+    def report(self):
+        return {
+            "elapsed_seconds": time.perf_counter() - self.start,
+            "phases": {name: {"phase": phase, "calls": calls, "seconds": seconds}
+                       for name, (phase, calls, seconds) in self.functions.items()},
+            "commands": {verb: {"calls": calls, "seconds": seconds} for verb, (calls, seconds) in self.verbs.items()},
+            "writes": self.writes,
+        }
+
+    def summary(self):
+        report = self.report()
+        lines = ["Run time: {:.3f} s, {} writes to the simulator".format(report["elapsed_seconds"], report["writes"]),
+                 "{:<12} {:<36} {:>8} {:>10} {:>10}".format("phase", "function / command", "calls", "total ms", "mean us")]
+        rows = [(entry["phase"], name, entry["calls"], entry["seconds"]) for name, entry in report["phases"].items()]
+        rows += [("api", verb, entry["calls"], entry["seconds"]) for verb, entry in report["commands"].items()]
+        for phase, name, calls, seconds in rows:
+            if calls:
+                lines.append("{:<12} {:<36} {:>8} {:>10.2f} {:>10.1f}".format(
+                    phase, name, calls, seconds * 1000, seconds / calls * 1e6))
+        return "\n".join(lines) + "\n"
+
+    def write_report(self, path=None):
+        if self.reported:
+            return
+        self.reported = True
+        if path is None:
+            sys.stderr.write(self.summary())
+            sys.stderr.flush()
+            return
+        with open(path, "w") as report_file:
+            json.dump(self.report(), report_file, indent=2)
+
+    def report_at_exit(self, path=None):
+        '''Print the summary to stderr (or write the JSON report to path) when the process exits.'''
+        atexit.register(self.write_report, path)
@@ -15,6 +15,8 @@ This script controls a robot to navigate through a maze using a left-wall-follow
      - `2`: South
      - `3`: West
    - `update_position()` updates the robot's position `(x, y)` based on the direction and movement.
+   - `sense_wall()` checks a wall next to the mouse and records it in `maze_map`, the `MazeMap` shared with the
+     flood-fill solver, so the walls seen while following the wall are kept.
    - `update_direction(turn_difriction)` adjusts the robot's direction after a turn, ensuring the direction is always within valid bounds (0-3).
 
 3. Wall Detection and Navigation:
@@ -22,147 +24,257 @@ This script controls a robot to navigate through a maze using a left-wall-follow
      - If there's a wall on the left, it checks if it can move forward.
      - If blocked ahead, it checks the right side.
      - If surrounded by walls, it turns around and continues.
-   - `API.wallLeft()`, `API.wallFront()`, and `API.wallRight()` are used to detect the presence of walls.
+   - `API.wallLeft()`, `API.wallFront()`, and `API.wallRight()` (called through `sense_wall()`, which sends the `API.checkWall()` command for a side from `Heading.SIDE_COMMANDS`) are used to detect the presence of walls.
 
 4. Goal Detection:
    - `check()` verifies if the robot has reached one of the goal positions:
      - Logs the success and elapsed time upon reaching the goal.
+   - `move_forward()` records the state `(x, y, cur_direction)` after every move. Wall following is deterministic, so a
+     repeated state means the robot is circling an island that does not hold the goal (mazes 3 and 4 in the README).
+     The run is then handed over to the flood-fill solver, which continues from the same pose with the walls seen so far,
+     so every run ends in bounded time.
+   - A simulator reset (noticed by `API.moveForward()` without an extra round trip) makes `run()` acknowledge it and
+     start again from `(0, 0)` with the walls seen so far.
+   - All of this state lives in a solver object that talks to the simulator through the `API.Session` it is given,
+     so several runs can share one process.
 
 5. Color Marking:
    - The starting position is marked with red (`'R'`) and labeled `"Start"`.
    - The goal position is marked with green (`'G'`) and labeled `"Goal"`.
-   - Cells visited by the robot are marked with `'a'` using `API.setColor()`.
+   - Cells visited by the robot are marked with `'a'` through `Display.set_color()`. The `Display` only sends the
+     changes, so repainting a visited cell costs nothing, and `DRAW_MODE` can limit drawing to `DRAW_RATE` updates
+     per second or to the end of the run (see Display.py).
 
 6. Main Algorithm:
    - Executes a continuous loop where the robot navigates the maze, follows the left wall, and adjusts its position until the goal is reached.
 
-7. Improvement Suggestions:
-   - Enhance the algorithm to dynamically switch between left and right wall-following based on specific maze configurations.
-   - Implement a flood-fill algorithm for more efficient navigation in complex mazes.
-   - Improve the logging mechanism for debugging and visualization purposes.
+7. Logging and Instrumentation:
+   - `self.log` (see Trace.py) writes to standard error, or to a JSON lines trace file when `TRACE_FILE` is set.
+     Every wall check, turn and move is logged at `Trace.DEBUG`, which is off unless `LOG_LEVEL` asks for it.
+   - `INSTRUMENT` times the wall checks and moves in `PHASES` and every API command (see Instrumentation.py) and
+     prints a summary at exit, or writes it to `INSTRUMENT_FILE`.
+   - `RECORD_FILE` records the run's commands and replies to a replay log (see Replay.py).
 """
 
 ########################################################################################################################################
 
-import sys
 import API
 import time
+import FloodfillAlgorithm
+import Trace
+from Display import Display
+from Heading import ABSOLUTE, DELTA_X, DELTA_Y, FRONT, LEFT, RIGHT, SIDE_COMMANDS
+from Instrumentation import Instrumentation
+from MazeMap import MazeMap
 
-cur_direction = 0
-# Current position starts from (0, 0)
-x, y = 0, 0
-
-def log_message(text):
-    sys.stderr.write(text)
-    sys.stderr.flush()
-
-def print_pos(x, y):
-    # Print the current position
-    log_message("Position ({}, {})\n".format(x, y))
-
-def check(x, y, goal_positions, start_time):
-    if (x, y) in goal_positions:
-        end_time = time.time()
-        completion_time = end_time - start_time
-        log_message("The mouse reached one of the goals!!\n")
-        log_message("Goal reached at ({}, {})\n".format(x, y))
-        log_message("Elapsed time: {:.2f} seconds\n".format(completion_time))
-        return True
-    return False
-
-# Updates the position of the mouse based on the current direction
-def update_position():
-    global x, y
-    if cur_direction == 0:  # Facing north
-        y += 1
-    elif cur_direction == 1:  # Facing east
-        x += 1
-    elif cur_direction == 2:  # Facing south
-        y -= 1
-    elif cur_direction == 3:  # Facing west
-        x -= 1
-
-# This function takes -1 if turned to left, 1 if turned to right
-def update_direction(turn_difriction):
-    global cur_direction
-    cur_direction = (cur_direction + turn_difriction) % 4
-
-def mark_as_visited():
-    API.setColor(x, y, 'a')
+# Messages below this level are dropped (see Trace.py); Trace.DEBUG shows every wall check, turn and move
+LOG_LEVEL = Trace.INFO
+# JSON lines file to write the log to instead of stderr, or None
+TRACE_FILE = None
 
-def main():
-    log_message("Running...\n")
+# How the run is drawn (see Display.py): "live", "throttled" (at most DRAW_RATE updates per second) or "end"
+DRAW_MODE = "live"
+DRAW_RATE = 30
+
+# Time every wall check, move and API command and report at exit (to stderr, or as JSON to INSTRUMENT_FILE)
+INSTRUMENT = False
+INSTRUMENT_FILE = None
+# Replay log (see Replay.py) to record the run's commands and replies to, or None
+RECORD_FILE = None
+# Methods timed by Instrumentation: method name: phase
+PHASES = {"sense_wall": "sensing", "move_forward": "actuation"}
+
+class CircuitDetected(Exception):
+    pass
+
+class LefthandSolver:
+    def __init__(self, api, log=None, instrumentation=None, display=None):
+        self.api = api
+        self.display = Display(api, DRAW_MODE, DRAW_RATE) if display is None else display
+        self.instrumentation = instrumentation
+        if instrumentation is not None:
+            instrumentation.attach(api)
+            instrumentation.instrument(self, PHASES)
+        self.log = Trace.Logger("LefthandRule", LOG_LEVEL, TRACE_FILE) if log is None else log
+        self.cur_direction = 0
+        # Current position starts from (0, 0)
+        self.x, self.y = 0, 0
+        # Walls seen so far; created in run() once the maze size is known
+        self.maze_map = None
+        # (x, y, cur_direction) after every move, to detect circuits
+        self.visited_states = set()
+
+    def print_pos(self, x, y):
+        # Print the current position
+        if self.log.debug_enabled:
+            self.log.debug("Position ({x}, {y})", x=x, y=y)
+
+    def check(self, x, y, goal_positions, start_time):
+        if (x, y) in goal_positions:
+            end_time = time.time()
+            completion_time = end_time - start_time
+            self.log.info("The mouse reached one of the goals!!")
+            self.log.info("Goal reached at ({x}, {y})", x=x, y=y)
+            self.log.info("Elapsed time: {seconds:.2f} seconds", seconds=completion_time)
+            return True
+        return False
 
-    # Define goal positions
-    goal_positions = [((API.mazeWidth())-4, (API.mazeHeight()//2)-1)]
+    # Updates the position of the mouse based on the current direction
+    def update_position(self):
+        self.x += DELTA_X[self.cur_direction]
+        self.y += DELTA_Y[self.cur_direction]
 
-    # Set initial and goal positions
-    API.setColor(x, y, 'R')
-    API.setText(x, y, "Start")
+    # This function takes -1 if turned to left, 1 if turned to right
+    def update_direction(self, turn_difriction):
+        self.cur_direction = (self.cur_direction + turn_difriction) % 4
 
-    for gx, gy in goal_positions:
-        API.setColor(gx, gy, 'G')
-        API.setText(gx, gy, "Goal")
+    # Checks the wall on one side of the mouse (FRONT, RIGHT or LEFT, see Heading.py) and records it in maze_map
+    def sense_wall(self, side):
+        api = self.api
+        is_wall = api.checkWall(SIDE_COMMANDS[side])
+        if is_wall:
+            maze_map = self.maze_map
+            maze_map.add_wall(maze_map.cell(self.x, self.y), ABSOLUTE[self.cur_direction][side])
+        return is_wall
 
-    log_message("Colors were set...\n")
+    def mark_as_visited(self):
+        self.display.set_color(self.x, self.y, 'a')
 
-    start_time = time.time()
+    # Moves one cell forward. Wall following is deterministic, so coming back to a state (x, y, cur_direction) seen
+    # before means the mouse is going round a circuit without the goal, and would keep going round it forever
+    def move_forward(self):
+        self.mark_as_visited()
+        self.api.moveForward()
+        self.update_position()
+        self.print_pos(self.x, self.y)
+        state = (self.x, self.y, self.cur_direction)
+        if state in self.visited_states:
+            raise CircuitDetected()
+        self.visited_states.add(state)
 
-    while True:
-        if check(x, y, goal_positions, start_time):
+    # Hands the run over to the flood-fill solver, which carries on from the current pose with the walls seen so far
+    def hand_over_to_flood_fill(self, goal_positions, start_time):
+        maze_map = self.maze_map
+        goal_cells = [maze_map.cell(gx, gy) for gx, gy in goal_positions if maze_map.in_bounds(gx, gy)]
+        if not goal_cells:
+            # The fixed goal is off the grid of mazes narrower than 4 cells
+            self.log.warning("No goal inside the {width}x{height} maze, not handing over to flood fill",
+                             width=maze_map.cols, height=maze_map.rows)
             return
+        solver = FloodfillAlgorithm.FloodfillSolver(self.api, log=self.log, instrumentation=self.instrumentation,
+                                                   display=self.display)
+        solver.take_over(maze_map.cell(self.x, self.y), self.cur_direction, maze_map, goal_cells)
+        self.x, self.y = maze_map.cell_xy[solver.current_cell]
+        if not self.check(self.x, self.y, goal_positions, start_time):
+            self.log.warning("Flood fill could not reach the goal")
 
-        # Follow the left wall
-        while API.wallLeft():
-            if check(x, y, goal_positions, start_time):
+    # Follows the left wall until the goal is reached; raises CircuitDetected if the mouse starts repeating itself
+    def follow_wall(self, goal_positions, start_time):
+        api = self.api
+        while True:
+            if self.check(self.x, self.y, goal_positions, start_time):
                 return
 
-            log_message("Wall on the left\n")
-            if not API.wallFront():
-                # If there's no wall in front, move forward
-                mark_as_visited()
-                API.moveForward()
-                update_position()
-                print_pos(x, y)
-                log_message("Moved one step forward\n")
-            else:
-                # If there is a wall in front
-                if not API.wallRight():
-                    log_message("Wall in front\n")
-                    log_message("No wall on the right\n")
-                    API.turnRight()
-                    update_direction(1)
-                    log_message("Turned to the right\n")
-                    mark_as_visited()
-                    API.moveForward()
-                    update_position()
-                    print_pos(x, y)
-                    log_message("Moved forward\n")
+            # Follow the left wall
+            while self.sense_wall(LEFT):
+                if self.check(self.x, self.y, goal_positions, start_time):
+                    return
+
+                self.log.debug("Wall on the left")
+                if not self.sense_wall(FRONT):
+                    # If there's no wall in front, move forward
+                    self.move_forward()
+                    self.log.debug("Moved one step forward")
                 else:
-                    # If there are walls in all directions
-                    # Turn around and move forward
-                    API.turnRight()
-                    update_direction(1)
-                    API.turnRight()
-                    update_direction(1)
-                    log_message("Turned around\n")
-                    mark_as_visited()
-                    API.moveForward()
-                    update_position()
-                    print_pos(x, y)
-                    log_message("Moved forward\n")
-
-        if check(x, y, goal_positions, start_time):
-            return
+                    # If there is a wall in front
+                    if not self.sense_wall(RIGHT):
+                        self.log.debug("Wall in front")
+                        self.log.debug("No wall on the right")
+                        api.turnRight()
+                        self.update_direction(1)
+                        self.log.debug("Turned to the right")
+                        self.move_forward()
+                        self.log.debug("Moved forward")
+                    else:
+                        # If there are walls in all directions
+                        # Turn around and move forward
+                        api.turnRight()
+                        self.update_direction(1)
+                        api.turnRight()
+                        self.update_direction(1)
+                        self.log.debug("Turned around")
+                        self.move_forward()
+                        self.log.debug("Moved forward")
+
+            if self.check(self.x, self.y, goal_positions, start_time):
+                return
+
+            # Turn left if there's no wall on the left
+            api.turnLeft()
+            self.update_direction(-1)
+            if self.log.debug_enabled:
+                self.log.debug("cur_direction = {direction}", direction=self.cur_direction)
+            self.move_forward()
 
-        # Turn left if there's no wall on the left
-        API.turnLeft()
-        update_direction(-1)
-        log_message(f"cur_direction = {cur_direction}\n")
-        mark_as_visited()
-        API.moveForward()
-        update_position()
-        print_pos(x, y)
+    def run(self):
+        try:
+            while True:
+                try:
+                    self.solve()
+                    return
+                except API.MouseResetError:
+                    self.restart()
+        finally:
+            self.display.flush()
+
+    # The simulator was reset: start again from (0, 0), keeping the walls seen so far
+    def restart(self):
+        self.log.info("Simulator reset, starting again")
+        self.api.ackReset()
+        self.x, self.y = 0, 0
+        self.cur_direction = 0
+        # The same states come round again after a reset, and they do not mean a circuit
+        self.visited_states.clear()
+
+    def solve(self):
+        api = self.api
+        self.log.info("Running...")
+        # Asked once per session: later runs and resets get the size without a round trip
+        width, height = api.mazeSize()
+        if self.maze_map is None:
+            self.maze_map = MazeMap(height, width)
+
+        # Define goal positions
+        goal_positions = [(width - 4, (height // 2) - 1)]
+
+        # Set initial and goal positions
+        self.display.set_color(self.x, self.y, 'R')
+        self.display.set_text(self.x, self.y, "Start")
+
+        for gx, gy in goal_positions:
+            self.display.set_color(gx, gy, 'G')
+            self.display.set_text(gx, gy, "Goal")
+
+        self.log.info("Colors were set...")
+
+        start_time = time.time()
+
+        try:
+            self.follow_wall(goal_positions, start_time)
+        except CircuitDetected:
+            self.log.info("Circuit detected at ({x}, {y}), handing over to flood fill", x=self.x, y=self.y)
+            self.hand_over_to_flood_fill(goal_positions, start_time)
+
+def main():
+    instrumentation = None
+    if INSTRUMENT:
+        instrumentation = Instrumentation()
+        instrumentation.report_at_exit(INSTRUMENT_FILE)
+    if RECORD_FILE:
+        # Replay.py brings in the benchmark tools, so it is only imported when a run is recorded
+        import Replay
+        API.setTransport(Replay.Recorder(API.session.transport, RECORD_FILE, {"solver": "LefthandRule"}))
+    LefthandSolver(API.session, instrumentation=instrumentation).run()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
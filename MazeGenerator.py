@@ -0,0 +1,152 @@
+########################################################################################################################################
+                                                        # Maze Generator File #
+
+"""
+This script generates random mazes for stress tests, from a seed, so the same seed always gives the same maze.
+
+1. Perfect Mazes:
+   - `generate_maze()` starts from a grid with every wall up and carves a spanning tree with an iterative depth-first
+     search (the recursive backtracker), so there is exactly one path between any two cells.
+   - The walls inside the center goal (2x2 on even sized mazes) are removed, as in micromouse mazes.
+
+2. Imperfect Mazes:
+   - `loops` is the probability of removing each remaining inner wall, which adds loops (0 keeps the maze perfect).
+   - `islands` cuts that many rings of walls loose from the rest of the maze: every wall that crosses a one cell
+     wide ring corridor around a block of cells is removed, so the walls inside the ring no longer touch the walls
+     outside it. The first island surrounds the center goal, the others random blocks. A mouse following a wall from
+     the outside can never reach an island, as in mazes 3 and 4 of the README.
+
+3. Output:
+   - Mazes are `HeadlessSimulator.Maze` objects, written with `HeadlessSimulator.save_maze()` as `.num` or `.map`
+     files that Benchmark.py, Tournament.py and the simulators read.
+   - Sizes go from 2x2 up to `MAX_SIZE` cells per side.
+         python MazeGenerator.py OUT_DIR [--count N] [--width W] [--height H] [--loops P] [--islands N] [--seed S]
+                                 [--format num|map]
+"""
+
+########################################################################################################################################
+
+import argparse
+import os
+import random
+
+from Heading import DELTA_X, DELTA_Y
+from HeadlessSimulator import Maze, save_maze
+
+MAX_SIZE = 256
+
+
+def center_block(width, height):
+    '''Return the (x0, y0, x1, y1) corners of the center goal cells.'''
+    return (width - 1) // 2, (height - 1) // 2, width // 2, height // 2
+
+
+def carve_spanning_tree(maze, generator):
+    '''Remove walls along a random depth-first spanning tree, starting from the start cell.'''
+    visited = [[False] * maze.height for _ in range(maze.width)]
+    visited[0][0] = True
+    stack = [(0, 0)]
+    while stack:
+        x, y = stack[-1]
+        directions = [direction for direction in range(4)
+                      if maze.in_bounds(x + DELTA_X[direction], y + DELTA_Y[direction])
+                      and not visited[x + DELTA_X[direction]][y + DELTA_Y[direction]]]
+        if not directions:
+            stack.pop()
+            continue
+        direction = generator.choice(directions)
+        maze.clear_wall(x, y, direction)
+        next_x, next_y = x + DELTA_X[direction], y + DELTA_Y[direction]
+        visited[next_x][next_y] = True
+        stack.append((next_x, next_y))
+
+
+def open_block(maze, x0, y0, x1, y1):
+    '''Remove every wall between the cells of a block.'''
+    for x in range(x0, x1 + 1):
+        for y in range(y0, y1 + 1):
+            if x < x1:
+                maze.clear_wall(x, y, 1)
+            if y < y1:
+                maze.clear_wall(x, y, 0)
+
+
+def cut_island(maze, x0, y0, x1, y1):
+    '''Detach the walls inside a block from the walls around it, by opening the ring of cells around the block.'''
+    left, bottom, right, top = x0 - 1, y0 - 1, x1 + 1, y1 + 1
+    for x in range(left, right):
+        maze.clear_wall(x, bottom, 1)
+        maze.clear_wall(x, top, 1)
+    for y in range(bottom, top):
+        maze.clear_wall(left, y, 0)
+        maze.clear_wall(right, y, 0)
+
+
+def add_loops(maze, generator, loops):
+    '''Remove each remaining inner wall with probability loops.'''
+    for x in range(maze.width):
+        for y in range(maze.height):
+            for direction in (0, 1):
+                if (maze.in_bounds(x + DELTA_X[direction], y + DELTA_Y[direction]) and maze.has_wall(x, y, direction)
+                        and generator.random() < loops):
+                    maze.clear_wall(x, y, direction)
+
+
+def random_block(width, height, generator):
+    '''Pick a block of cells whose ring lies inside the maze, away from the border.'''
+    block_width = generator.randint(1, max(1, min(4, width - 4)))
+    block_height = generator.randint(1, max(1, min(4, height - 4)))
+    x0 = generator.randint(2, width - 2 - block_width)
+    y0 = generator.randint(2, height - 2 - block_height)
+    return x0, y0, x0 + block_width - 1, y0 + block_height - 1
+
+
+def generate_maze(width, height, seed=None, loops=0.0, islands=0):
+    '''Return a random Maze; the same arguments always give the same maze.'''
+    if not (2 <= width <= MAX_SIZE and 2 <= height <= MAX_SIZE):
+        raise ValueError("maze sides must be between 2 and {} cells".format(MAX_SIZE))
+    generator = random.Random(seed)
+    maze = Maze(width, height)
+    for x in range(width):
+        for y in range(height):
+            maze.set_wall(x, y, 0)
+            maze.set_wall(x, y, 1)
+
+    carve_spanning_tree(maze, generator)
+    add_loops(maze, generator, loops)
+    goal = center_block(width, height)
+    open_block(maze, *goal)
+    # A ring needs one cell of room on every side of its block, plus the border
+    if islands > 0 and width >= 6 and height >= 6:
+        cut_island(maze, *goal)
+        for _ in range(islands - 1):
+            cut_island(maze, *random_block(width, height, generator))
+    return maze
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate random mazes in the headless simulator's file formats.")
+    parser.add_argument("out_dir", help="directory to write the mazes to")
+    parser.add_argument("--count", type=int, default=1, help="number of mazes")
+    parser.add_argument("--width", type=int, default=16, help="cells per row (at most {})".format(MAX_SIZE))
+    parser.add_argument("--height", type=int, help="cells per column (default: same as --width)")
+    parser.add_argument("--loops", type=float, default=0.0, help="probability of removing each inner wall")
+    parser.add_argument("--islands", type=int, default=0, help="wall islands to cut loose, the first at the center")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first maze; the next ones count up from it")
+    parser.add_argument("--format", choices=("num", "map"), default="num", help="file format")
+    args = parser.parse_args()
+    height = args.width if args.height is None else args.height
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    for seed in range(args.seed, args.seed + args.count):
+        try:
+            maze = generate_maze(args.width, height, seed, args.loops, args.islands)
+        except ValueError as error:
+            parser.error(str(error))
+        path = os.path.join(args.out_dir, "maze_{}x{}_{}.{}".format(args.width, height, seed, args.format))
+        save_maze(maze, path)
+    print("Wrote {} mazes to {}".format(args.count, args.out_dir))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+########################################################################################################################################
+                                                            # Maze Map File #
+
+"""
+This script provides `MazeMap`, the map of a maze as learned by a solver. All three solvers share it. Key components include:
+
+1. Storage:
+   - Cells are numbered row by row (`index = row * cols + col`, row 0 at the top), and the solvers hold cells as these
+     flat indices. A maze has `rows` = its height and `cols` = its width, so rectangular mazes work too.
+   - `cell(x, y)` converts simulator coordinates (`(0, 0)` bottom-left, north is `y + 1`) to an index, and the
+     `cell_xy` table, built once per map, converts back, so drawing a cell costs one tuple lookup. `cell()` does not
+     check its arguments; `in_bounds(x, y)` tells whether a position is on the grid.
+   - `walls` is a contiguous `uint8` array holding one wall bitmask per cell:
+     up `0b1000`, right/east `0b0100`, down/south `0b0010`, left/west `0b0001` (`WALL_BITS`, from Heading.py).
+     Every wall is stored on both cells it separates, and the maze border is set from the start, so a move can be
+     checked with a single bit test and no bounds checks.
+   - `distances` is a contiguous `uint16` array holding the flood-fill distance of every cell to the goal,
+     `UNREACHABLE` for cells that cannot reach it on the known map. Both arrays are allocated once per map; every
+     fill starts by copying the map's all-`UNREACHABLE` array over `distances`, without allocating.
+
+2. Walls:
+   - `add_wall()` records a wall given a cell index and an absolute direction (Up = 0, Right = 1, Down = 2, Left = 3).
+     It returns the indices of the two cells the wall separates if the wall is new, and nothing if it was known.
+   - `has_wall()` and `open_neighbours()` answer questions about the known map.
+
+3. Distances:
+   - `flood()` computes breadth-first distances from one or more seed cells (indices), optionally only through a given
+     set of cells.
+   - `repair()` updates the distances after new walls were added, touching only the cells whose distance changes.
+   - `layer()` returns a map that shares the walls but keeps distances of its own, so a solver can keep several fills
+     and repair each one as walls are found.
+   - `path()` searches breadth-first from one cell and stops at the nearest target cell, so a nearby target costs a
+     handful of cells instead of a fill of the whole maze.
+
+4. Map Files:
+   - `save()` writes the walls to a compact binary file: a 12 byte header (`MAP_MAGIC`, rows, cols), the `walls`
+     array as it is in memory (one byte per cell), then one byte per cell set to 1 for the cells whose four walls
+     are all known (the cells the robot stood in). The file is replaced atomically.
+   - `MazeMap.load()` reads it back and returns the map and the set of fully known cells. With `mapped=True` the
+     walls are not read but memory-mapped from the file (copy-on-write, so the file itself never changes), which
+     keeps loading cheap for large mazes.
+
+5. Whole-grid operations (these need NumPy, which is only imported the first time one of them runs, so solvers that
+   never use them start without loading it; `has_numpy()` checks for it without importing it):
+   - `wall_grid()` and `distance_grid()` are `(rows, cols)` NumPy views that share memory with the arrays above.
+   - `open_masks()` returns, for each direction, a boolean grid of the cells that can move that way.
+   - `wavefront()` computes the same distances as `flood()`, but expands the whole frontier at once: each step shifts
+     the frontier mask one cell in every open direction, so a fill costs a few array operations per distance level
+     instead of Python work per cell.
+"""
+
+########################################################################################################################################
+
+import importlib.util
+import mmap
+import os
+import struct
+from array import array
+from collections import deque
+from heapq import heappush, heappop
+
+from Heading import WALL_BITS, DELTA_ROW, DELTA_COL, OPPOSITE
+
+# Imported by require_numpy() on first use
+numpy = None
+
+# Distance given to cells that cannot reach the goal on the known map
+UNREACHABLE = 0xFFFF
+
+# Map files: magic, rows, cols, then the walls and the fully known cells, one byte per cell each
+MAP_MAGIC = b"MAZEMAP1"
+MAP_HEADER = struct.Struct("<8sHH")
+
+
+def has_numpy():
+    return numpy is not None or importlib.util.find_spec("numpy") is not None
+
+
+def require_numpy():
+    global numpy
+    if numpy is None:
+        try:
+            import numpy
+        except ImportError:
+            raise ImportError("NumPy is required for whole-grid MazeMap operations")
+
+
+class MazeMap:
+    def __init__(self, rows, cols):
+        self.rows = rows
+        self.cols = cols
+        self.size = rows * cols
+        # Index offset to the neighbouring cell in each direction
+        self.offsets = tuple(row * cols + col for row, col in zip(DELTA_ROW, DELTA_COL))
+        # Simulator (x, y) of every cell index
+        self.cell_xy = tuple((col, rows - 1 - row) for row in range(rows) for col in range(cols))
+        self.walls = array("B", bytes(self.size))
+        self.unreachable = array("H", [UNREACHABLE]) * self.size
+        self.distances = array("H", self.unreachable)
+        self.seeds = set()
+        self.seed_distance = 0
+        for col in range(cols):
+            self.walls[col] |= WALL_BITS[0]
+            self.walls[self.size - cols + col] |= WALL_BITS[2]
+        for row in range(rows):
+            self.walls[row * cols] |= WALL_BITS[3]
+            self.walls[row * cols + cols - 1] |= WALL_BITS[1]
+
+    def index(self, row, col):
+        return row * self.cols + col
+
+    def cell(self, x, y):
+        '''Index of the cell at simulator coordinates (x, y), which must be in_bounds().'''
+        return (self.rows - 1 - y) * self.cols + x
+
+    def in_bounds(self, x, y):
+        return 0 <= x < self.cols and 0 <= y < self.rows
+
+    def has_wall(self, i, direction):
+        return bool(self.walls[i] & WALL_BITS[direction])
+
+    def add_wall(self, i, direction):
+        '''Record a wall and return the indices of the two cells it separates, or () if it was already known.'''
+        bit = WALL_BITS[direction]
+        if self.walls[i] & bit:
+            return ()
+        j = i + self.offsets[direction]
+        self.walls[i] |= bit
+        self.walls[j] |= WALL_BITS[OPPOSITE[direction]]
+        return (i, j)
+
+    def open_neighbours(self, i):
+        '''Yield the indices of the cells that can be reached from cell i in one move on the known map.'''
+        cell = self.walls[i]
+        for bit, offset in zip(WALL_BITS, self.offsets):
+            if not cell & bit:
+                yield i + offset
+
+    def layer(self):
+        '''Return a map that shares this map's walls (new walls show up in both) with distances of its own.'''
+        layer = MazeMap(self.rows, self.cols)
+        layer.walls = self.walls
+        return layer
+
+    def path(self, start, targets, directions=(0, 1, 2, 3)):
+        '''Return the directions of a shortest path from start to the nearest of targets, or None if none can be
+        reached. Ties go to the first of directions.'''
+        if start in targets:
+            return []
+        walls, offsets = self.walls, self.offsets
+        came_from = {start: None}
+        queue = deque([start])
+        while queue:
+            i = queue.popleft()
+            for direction in directions:
+                if walls[i] & WALL_BITS[direction]:
+                    continue
+                j = i + offsets[direction]
+                if j in came_from:
+                    continue
+                came_from[j] = (i, direction)
+                if j in targets:
+                    route = []
+                    while j != start:
+                        j, direction = came_from[j]
+                        route.append(direction)
+                    route.reverse()
+                    return route
+                queue.append(j)
+        return None
+
+    def reset_distances(self):
+        self.distances[:] = self.unreachable
+
+    def flood(self, seeds, distance=0, allowed_cells=None):
+        '''Fill distances breadth-first from the seed cells (indices).
+
+        With allowed_cells (a set of indices), the search only enters those cells.
+        '''
+        self.reset_distances()
+        distances = self.distances
+        self.seeds = set(seeds)
+        self.seed_distance = distance
+        for i in self.seeds:
+            distances[i] = distance
+        queue = deque(self.seeds)
+        while queue:
+            i = queue.popleft()
+            next_distance = distances[i] + 1
+            for j in self.open_neighbours(i):
+                if distances[j] > next_distance and (allowed_cells is None or j in allowed_cells):
+                    distances[j] = next_distance
+                    queue.append(j)
+
+    def repair(self, changed_cells):
+        '''Repair distances after new walls were found next to changed_cells (cell indices).
+
+        A new wall can only make paths longer, so a cell keeps its distance as long
+        as one of its open neighbours is still one step closer to the goal. Cells
+        that lost all such neighbours are raised to UNREACHABLE (which may strip the
+        support of the cells behind them), then refilled from the intact cells
+        around them. Only the region whose distances really change is visited.
+        '''
+        distances = self.distances
+        raised = []
+        stack = list(changed_cells)
+        while stack:
+            i = stack.pop()
+            distance = distances[i]
+            if distance == UNREACHABLE or i in self.seeds:
+                continue
+            neighbours = list(self.open_neighbours(i))
+            if any(distances[j] == distance - 1 for j in neighbours):
+                continue
+            distances[i] = UNREACHABLE
+            raised.append(i)
+            stack.extend(j for j in neighbours if distances[j] == distance + 1)
+
+        queue = []
+        for i in raised:
+            best = min((distances[j] for j in self.open_neighbours(i)), default=UNREACHABLE)
+            if best + 1 < distances[i]:
+                distances[i] = best + 1
+                heappush(queue, (best + 1, i))
+        while queue:
+            distance, i = heappop(queue)
+            if distance > distances[i]:
+                continue
+            for j in self.open_neighbours(i):
+                if distances[j] > distance + 1:
+                    distances[j] = distance + 1
+                    heappush(queue, (distance + 1, j))
+
+    def save(self, path, known_cells=()):
+        '''Write the walls, and the cells (indices) whose four walls are all known, to a binary map file.'''
+        known = bytearray(self.size)
+        for i in known_cells:
+            known[i] = 1
+        temporary_path = path + ".tmp"
+        with open(temporary_path, "wb") as map_file:
+            map_file.write(MAP_HEADER.pack(MAP_MAGIC, self.rows, self.cols))
+            map_file.write(self.walls.tobytes())
+            map_file.write(known)
+        os.replace(temporary_path, path)
+
+    @classmethod
+    def load(cls, path, mapped=False):
+        '''Read a map file written by save() and return (maze_map, known_cells).'''
+        with open(path, "rb") as map_file:
+            data = mmap.mmap(map_file.fileno(), 0, access=mmap.ACCESS_COPY) if mapped else map_file.read()
+        if len(data) < MAP_HEADER.size:
+            raise ValueError("{} is not a maze map file".format(path))
+        magic, rows, cols = MAP_HEADER.unpack_from(data)
+        size = rows * cols
+        if magic != MAP_MAGIC or len(data) != MAP_HEADER.size + 2 * size:
+            raise ValueError("{} is not a maze map file".format(path))
+        maze_map = cls(rows, cols)
+        walls_end = MAP_HEADER.size + size
+        if mapped:
+            maze_map.walls = memoryview(data)[MAP_HEADER.size:walls_end]
+        else:
+            maze_map.walls = array("B", data[MAP_HEADER.size:walls_end])
+        known_cells = {i for i, known in enumerate(data[walls_end:]) if known}
+        return maze_map, known_cells
+
+    def wall_grid(self):
+        require_numpy()
+        return numpy.frombuffer(self.walls, dtype=numpy.uint8).reshape(self.rows, self.cols)
+
+    def distance_grid(self):
+        require_numpy()
+        return numpy.frombuffer(self.distances, dtype=numpy.uint16).reshape(self.rows, self.cols)
+
+    def open_masks(self):
+        '''Boolean (rows, cols) grids, one per direction, of the cells that have no wall on that side.'''
+        walls = self.wall_grid()
+        return [(walls & bit) == 0 for bit in WALL_BITS]
+
+    def wavefront(self, seeds, distance=0):
+        '''Fill distances from the seed cells (indices), one whole distance level at a time.'''
+        up, right, down, left = self.open_masks()
+        distances = self.distance_grid()
+        distances.fill(UNREACHABLE)
+        self.seeds = set(seeds)
+        self.seed_distance = distance
+
+        frontier = numpy.zeros((self.rows, self.cols), dtype=bool)
+        frontier.reshape(-1)[list(self.seeds)] = True
+        reached = frontier.copy()
+        grown = numpy.empty_like(frontier)
+        while frontier.any():
+            distances[frontier] = distance
+            # A frontier cell with no wall on one side reaches the neighbour on that side
+            grown.fill(False)
+            grown[:-1, :] |= frontier[1:, :] & up[1:, :]
+            grown[1:, :] |= frontier[:-1, :] & down[:-1, :]
+            grown[:, 1:] |= frontier[:, :-1] & right[:, :-1]
+            grown[:, :-1] |= frontier[:, 1:] & left[:, 1:]
+            numpy.logical_and(grown, ~reached, out=frontier)
+            reached |= frontier
+            distance += 1
@@ -0,0 +1,304 @@
+########################################################################################################################################
+                                                             # Replay File #
+
+"""
+This script records runs at the `API.command` layer and plays them back without a simulator, so a slow or failing run
+can be reproduced, checked and profiled without the GUI.
+
+1. Recording:
+   - `Recorder` wraps the transport of an `API.Session` (the GUI's stdin/stdout, a `HeadlessSimulator`, a socket ...)
+     and logs every command line the solver writes and every reply line it reads, in the order they happen.
+   - Every solver has a `RECORD_FILE` constant: set it to a path to record the run the GUI starts.
+   - `record_run()` records a solver on a maze file with the headless simulator:
+         python Replay.py record maze.num run.rec [--solver NAME]
+
+2. Log Format:
+   - The file starts with `LOG_MAGIC` and a JSON header (the solver name, maze and solver options, when known).
+   - Every line is then one varint: `(string number << 1) | kind`, where kind is 0 for a command and 1 for a reply.
+     A string number seen for the first time is followed by the length and UTF-8 bytes of the line. Runs repeat a
+     handful of lines (`wallLeft`, `true`, `ack`, ...), so most lines take a single byte.
+   - Records are kept in memory and written `RECORD_BUFFER` bytes at a time, and when the recorder is closed (at exit
+     at the latest).
+
+3. Playback:
+   - `Player` is a transport that answers a solver from a log instead of a simulator, as fast as the CPU allows.
+   - With `check` (the default), every command the solver sends is compared with the log and the first difference
+     raises `ReplayMismatch`. Drawing commands (`DRAWING_COMMANDS`) are left out of the comparison, as throttled
+     drawing depends on the clock. `finish()` checks that the solver did not stop before the log does.
+   - `play_run()` runs the solver named in the log's header against it. The run does no I/O, so its time is the
+     solver's own, and `--profile` shows where it goes:
+         python Replay.py play run.rec [more logs...] [--solver NAME] [--no-check] [--profile]
+   - A set of logs therefore doubles as a regression test: the exit code is 1 if any replay no longer matches.
+"""
+
+########################################################################################################################################
+
+import argparse
+import atexit
+import cProfile
+import json
+import os
+import pstats
+import sys
+import time
+
+import API
+import Benchmark
+import HeadlessSimulator
+import Trace
+
+LOG_MAGIC = b"MAZEREC1"
+
+COMMAND = 0
+REPLY = 1
+
+# Bytes kept in memory before a log file is written
+RECORD_BUFFER = 65536
+
+# Commands that only draw; they never get a reply and do not change what the solver does
+DRAWING_COMMANDS = {"setWall", "clearWall", "setColor", "clearColor", "clearAllColor", "setText", "clearText",
+                    "clearAllText"}
+
+
+class ReplayMismatch(Exception):
+    pass
+
+
+def write_varint(buffer, value):
+    while value >= 0x80:
+        buffer.append(value & 0x7F | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def read_varint(data, position):
+    '''Return the varint at position and the position after it.'''
+    value = shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+
+class Recorder:
+    def __init__(self, transport, path, header=None):
+        self.transport = transport
+        self.file = open(path, "wb")
+        # Line: string number
+        self.strings = {}
+        self.buffer = bytearray(LOG_MAGIC)
+        header_bytes = json.dumps(header or {}).encode()
+        write_varint(self.buffer, len(header_bytes))
+        self.buffer += header_bytes
+        atexit.register(self.close)
+
+    def record(self, kind, line):
+        number = self.strings.get(line)
+        if number is None:
+            number = self.strings[line] = len(self.strings)
+            write_varint(self.buffer, number << 1 | kind)
+            data = line.encode()
+            write_varint(self.buffer, len(data))
+            self.buffer += data
+        else:
+            write_varint(self.buffer, number << 1 | kind)
+        if len(self.buffer) >= RECORD_BUFFER:
+            self.write_buffer()
+
+    def write_buffer(self):
+        if self.file is not None:
+            self.file.write(self.buffer)
+            self.buffer.clear()
+
+    def close(self):
+        self.write_buffer()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    # Transport interface used by API.Session
+
+    def write(self, data):
+        for line in data.splitlines():
+            self.record(COMMAND, line)
+        self.transport.write(data)
+
+    def flush(self):
+        self.transport.flush()
+
+    def readline(self):
+        line = self.transport.readline()
+        self.record(REPLY, line.rstrip("\n"))
+        return line
+
+
+def read_log(path):
+    '''Read a log written by a Recorder and return (header, [(kind, line), ...]).'''
+    with open(path, "rb") as log_file:
+        data = log_file.read()
+    if not data.startswith(LOG_MAGIC):
+        raise ValueError("{} is not a replay log".format(path))
+    length, position = read_varint(data, len(LOG_MAGIC))
+    header = json.loads(data[position:position + length].decode())
+    position += length
+    strings = []
+    records = []
+    while position < len(data):
+        code, position = read_varint(data, position)
+        number, kind = code >> 1, code & 1
+        if number == len(strings):
+            length, position = read_varint(data, position)
+            strings.append(data[position:position + length].decode())
+            position += length
+        records.append((kind, strings[number]))
+    return header, records
+
+
+def is_drawing(line):
+    return line.split(" ", 1)[0] in DRAWING_COMMANDS
+
+
+class Player:
+    '''Answers a solver from a recorded log instead of a simulator.'''
+
+    def __init__(self, path, check=True):
+        self.header, self.records = read_log(path)
+        self.check = check
+        self.position = 0
+        self.commands = 0
+
+    def next_record(self):
+        '''Return the next record that is not a drawing command, or None at the end of the log.'''
+        records = self.records
+        while self.position < len(records):
+            kind, line = records[self.position]
+            self.position += 1
+            if kind == REPLY or not is_drawing(line):
+                return kind, line
+        return None
+
+    def mismatch(self, message):
+        raise ReplayMismatch("line {} of the log: {}".format(self.position, message))
+
+    # Transport interface used by API.Session
+
+    def write(self, data):
+        for line in data.splitlines():
+            self.commands += 1
+            if not self.check or is_drawing(line):
+                continue
+            record = self.next_record()
+            if record is None:
+                self.mismatch("the solver sent {!r} after the end of the log".format(line))
+            if record != (COMMAND, line):
+                self.mismatch("the solver sent {!r}, the log has {} {!r}".format(
+                    line, "command" if record[0] == COMMAND else "reply", record[1]))
+
+    def flush(self):
+        pass
+
+    def readline(self):
+        while True:
+            record = self.next_record()
+            if record is None:
+                self.mismatch("the solver waits for a reply after the end of the log")
+            kind, line = record
+            if kind == REPLY:
+                return line + "\n"
+            if self.check:
+                self.mismatch("the solver waits for a reply, the log has command {!r}".format(line))
+
+    def finish(self):
+        '''Check that the log holds nothing the solver did not ask for.'''
+        if self.check:
+            record = self.next_record()
+            if record is not None:
+                self.mismatch("the solver stopped, the log goes on with {!r}".format(record[1]))
+
+
+def solver_class(solver):
+    script, class_name = Benchmark.SOLVERS[solver]
+    return getattr(Benchmark.load_solver(os.path.join(Benchmark.REPO_DIR, script)), class_name)
+
+
+def record_run(maze_path, path, solver="FloodfillAlgorithm", **options):
+    '''Run a solver on a maze file with the headless simulator and record the run to path.'''
+    simulator = HeadlessSimulator.HeadlessSimulator(HeadlessSimulator.load_maze(maze_path))
+    recorder = Recorder(simulator, path, {"solver": solver, "maze": maze_path, "options": options})
+    session = API.Session(recorder)
+    try:
+        solver_class(solver)(session, log=Trace.Logger(solver, Trace.OFF), **options).run()
+        session.flushCommands()
+    finally:
+        recorder.close()
+    return simulator
+
+
+def play_run(path, check=True, solver=None, profiler=None):
+    '''Replay a log to the solver it was recorded from (or to solver) and return (cpu seconds, player).
+
+    A cProfile profiler, if given, is only enabled while the solver runs.
+    '''
+    player = Player(path, check)
+    solver = solver or player.header.get("solver", "FloodfillAlgorithm")
+    options = player.header.get("options", {})
+    session = API.Session(player)
+    solver_object = solver_class(solver)(session, log=Trace.Logger(solver, Trace.OFF), **options)
+    start = time.process_time()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        solver_object.run()
+        session.flushCommands()
+    finally:
+        if profiler is not None:
+            profiler.disable()
+    seconds = time.process_time() - start
+    player.finish()
+    return seconds, player
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record solver runs and play them back without a simulator.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    record = commands.add_parser("record", help="record a run on a maze file with the headless simulator")
+    record.add_argument("maze", help="maze file in .num or .map format")
+    record.add_argument("log", help="log file to write")
+    record.add_argument("--solver", choices=sorted(Benchmark.SOLVERS), default="FloodfillAlgorithm")
+    play = commands.add_parser("play", help="play logs back to their solvers")
+    play.add_argument("logs", nargs="+", help="log files")
+    play.add_argument("--solver", choices=sorted(Benchmark.SOLVERS), help="solver to play to (default: the recorded one)")
+    play.add_argument("--no-check", action="store_true", help="feed the replies without comparing the commands")
+    play.add_argument("--profile", action="store_true", help="profile the replays and print the busiest functions")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        simulator = record_run(args.maze, args.log, args.solver)
+        print("Recorded {} commands to {} ({} bytes)".format(simulator.commands, args.log, os.path.getsize(args.log)))
+        return
+
+    profiler = cProfile.Profile() if args.profile else None
+    failures = 0
+    for path in args.logs:
+        try:
+            seconds, player = play_run(path, not args.no_check, args.solver, profiler)
+        except ReplayMismatch as error:
+            failures += 1
+            print("{}: MISMATCH, {}".format(path, error))
+            continue
+        except Exception as error:
+            # Without the check, a solver that went another way gets replies meant for other commands
+            failures += 1
+            print("{}: FAIL, {}: {}".format(path, type(error).__name__, error))
+            continue
+        print("{}: ok, {} commands in {:.2f} ms".format(path, player.commands, seconds * 1000))
+    if profiler is not None:
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(20)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
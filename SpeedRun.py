@@ -0,0 +1,175 @@
+########################################################################################################################################
+                                                           # Speed Run File #
+
+"""
+This script plans the speed run: the fastest route from the start to the goal over the part of the maze that was
+explored, given as a list of commands that can be sent straight to the simulator.
+
+1. Cost Model:
+   - Every straight is one `moveForward(n)` command. It costs `MOVE_COST` (accelerating and braking) plus
+     `CELL_COST` for each of its `n` cells, so one long straight is cheaper than several short ones.
+   - Every 90 degree turn costs `TURN_COST`.
+   - On the half-cell grid, a straight is one `moveForwardHalf(n)` command costing `MOVE_COST` plus `CELL_COST / 2`
+     per straight half step or `DIAGONAL_HALF_STEP_COST` (the same times the square root of 2) per diagonal one, and
+     every 45 degree turn costs `TURN_COST / 2`. A route on the cell grid costs the same on both grids.
+
+2. Search:
+   - `plan_route()` runs Dijkstra's algorithm over (cell, heading) states of a `MazeMap`. From each state the robot
+     can turn left, turn right, or drive any number of cells straight ahead.
+   - The route only uses cells in `allowed_cells` (the cells the robot visited, whose walls are all known), so it
+     never drives into a wall that was not sensed.
+
+3. Diagonals:
+   - `plan_diagonal_route()` searches the same way over (point, eighth) states of a half-cell grid, whose points are
+     the cell centers and the middles of the cell edges (`half_point()` numbers them). The robot can stand on a cell
+     center, or on an open edge between two allowed cells; posts and walled edges block it. From an edge middle it
+     can drive diagonally to the next edge middle through the corner of a cell, so a zig-zag corridor becomes one
+     diagonal straight instead of a 90 degree turn per cell.
+   - `half_steps()` follows a straight on the half-cell grid and returns the cells it passes through.
+
+4. Output:
+   - A list of `("turn", 1)` (right), `("turn", -1)` (left) and `("move", n)` actions, or `None` if no goal cell can be
+     reached through the allowed cells.
+   - The diagonal route uses `("turn", 1 / -1)` for 90 degree turns, `("turn45", 1 / -1)` for 45 degree turns and
+     `("half", n)` for `n` half steps.
+"""
+
+########################################################################################################################################
+
+import math
+from heapq import heappush, heappop
+
+from Heading import HALF_DELTA_COL, HALF_DELTA_ROW, WALL_BITS
+
+MOVE_COST = 2.0
+CELL_COST = 1.0
+TURN_COST = 2.0
+DIAGONAL_HALF_STEP_COST = CELL_COST / 2 * math.sqrt(2)
+
+
+def plan_route(maze_map, start, heading, goal_cells, allowed_cells):
+    '''Return the cheapest list of actions from the start cell and heading to any goal cell.
+
+    Headings are Up = 0, Right = 1, Down = 2, Left = 3. Cells are MazeMap indices.
+    '''
+    goals = set(goal_cells)
+    start_state = start * 4 + heading
+    costs = {start_state: 0.0}
+    parents = {start_state: None}
+    queue = [(0.0, start_state)]
+    while queue:
+        cost, state = heappop(queue)
+        if cost > costs[state]:
+            continue
+        cell, heading = divmod(state, 4)
+        if cell in goals:
+            return actions_to(state, parents)
+
+        moves = [((heading + 1) % 4, cell, TURN_COST, ("turn", 1)),
+                 ((heading - 1) % 4, cell, TURN_COST, ("turn", -1))]
+        bit, offset = WALL_BITS[heading], maze_map.offsets[heading]
+        next_cell, steps = cell, 0
+        while not maze_map.walls[next_cell] & bit and next_cell + offset in allowed_cells:
+            next_cell += offset
+            steps += 1
+            moves.append((heading, next_cell, MOVE_COST + steps * CELL_COST, ("move", steps)))
+
+        for next_heading, next_cell, step_cost, action in moves:
+            next_state = next_cell * 4 + next_heading
+            next_cost = cost + step_cost
+            if next_cost < costs.get(next_state, float("inf")):
+                costs[next_state] = next_cost
+                parents[next_state] = (state, action)
+                heappush(queue, (next_cost, next_state))
+    return None
+
+
+def actions_to(state, parents):
+    actions = []
+    while parents[state] is not None:
+        state, action = parents[state]
+        actions.append(action)
+    actions.reverse()
+    return actions
+
+
+def half_point(maze_map, cell):
+    '''Number of the point at the center of a cell on the half-cell grid of maze_map.'''
+    row, col = divmod(cell, maze_map.cols)
+    return (2 * row + 1) * (2 * maze_map.cols + 1) + 2 * col + 1
+
+
+def open_points(maze_map, allowed_cells):
+    '''Points of the half-cell grid the robot can stand on: allowed cell centers and the open edges between them.'''
+    points = set()
+    for cell in allowed_cells:
+        point = half_point(maze_map, cell)
+        points.add(point)
+        for direction, (bit, offset) in enumerate(zip(WALL_BITS, maze_map.offsets)):
+            if not maze_map.walls[cell] & bit and cell + offset in allowed_cells:
+                points.add(point + HALF_DELTA_ROW[2 * direction] * (2 * maze_map.cols + 1) + HALF_DELTA_COL[2 * direction])
+    return points
+
+
+def plan_diagonal_route(maze_map, start, heading, goal_cells, allowed_cells):
+    '''Return the cheapest list of actions on the half-cell grid from the start cell and heading to any goal cell.'''
+    points = open_points(maze_map, allowed_cells)
+    width = 2 * maze_map.cols + 1
+    steps_along = [HALF_DELTA_ROW[eighth] * width + HALF_DELTA_COL[eighth] for eighth in range(8)]
+    goals = {half_point(maze_map, cell) for cell in goal_cells}
+    start_state = half_point(maze_map, start) * 8 + 2 * heading
+    costs = {start_state: 0.0}
+    parents = {start_state: None}
+    queue = [(0.0, start_state)]
+    while queue:
+        cost, state = heappop(queue)
+        if cost > costs[state]:
+            continue
+        point, eighth = divmod(state, 8)
+        if point in goals:
+            return merge_turns(actions_to(state, parents))
+
+        moves = [((eighth + 1) % 8, point, TURN_COST / 2, ("turn45", 1)),
+                 ((eighth - 1) % 8, point, TURN_COST / 2, ("turn45", -1))]
+        step = steps_along[eighth]
+        step_cost = DIAGONAL_HALF_STEP_COST if eighth % 2 else CELL_COST / 2
+        next_point, steps = point + step, 1
+        while next_point in points:
+            moves.append((eighth, next_point, MOVE_COST + steps * step_cost, ("half", steps)))
+            next_point += step
+            steps += 1
+
+        for next_eighth, next_point, move_cost, action in moves:
+            next_state = next_point * 8 + next_eighth
+            next_cost = cost + move_cost
+            if next_cost < costs.get(next_state, float("inf")):
+                costs[next_state] = next_cost
+                parents[next_state] = (state, action)
+                heappush(queue, (next_cost, next_state))
+    return None
+
+
+def merge_turns(actions):
+    '''Send each pair of 45 degree turns the same way as one 90 degree turn.'''
+    merged = []
+    for action in actions:
+        if action[0] == "turn45" and merged and merged[-1] == action:
+            merged[-1] = ("turn", action[1])
+        else:
+            merged.append(action)
+    return merged
+
+
+def half_steps(maze_map, point, eighth, count):
+    '''Follow count half steps along eighth from point; return the cells passed through and the point reached.'''
+    width = 2 * maze_map.cols + 1
+    delta_row, delta_col = HALF_DELTA_ROW[eighth], HALF_DELTA_COL[eighth]
+    row, col = divmod(point, width)
+    cells = []
+    for _ in range(count):
+        # The cell holding the middle of the step; coordinates are doubled so the middle stays whole
+        middle_row, middle_col = 2 * row + delta_row, 2 * col + delta_col
+        cells.append(middle_row // 4 * maze_map.cols + middle_col // 4)
+        row, col = row + delta_row, col + delta_col
+    return cells, row * width + col
+
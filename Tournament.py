@@ -0,0 +1,142 @@
+########################################################################################################################################
+                                                           # Tournament File #
+
+"""
+This script plays every solver configuration on every maze of a set, spread over all CPU cores, so thousands of mazes
+can be compared in seconds instead of minutes of GUI time per maze.
+
+1. Entries:
+   - `CONFIGS` names the solver configurations that take part: the flood-fill solver (with and without its speed run,
+     exploring until the shortest route is proven, with the diagonal speed run, and with the NumPy wavefront backend
+     when NumPy is installed) and both wall followers.
+   - Every run creates its own solver object and `API.Session` on its own `HeadlessSimulator`, through
+     `Benchmark.run_solver()`, so runs share no state and measure the same things as the benchmark.
+
+2. Scheduling:
+   - Mazes are given as files or directories of `.num` / `.map` files.
+   - A `ProcessPoolExecutor` with one worker per core (`--workers`) takes one maze per task and plays every configuration
+     on it, so each maze file is read and parsed once. Workers import the solvers once and reuse them for every task.
+   - Results are printed as soon as each maze is done (`--quiet` turns this off), in whatever order they finish.
+
+3. Summary (one line per configuration):
+   - `success` rate, mean `cells` moved, mean `distance` (path length in cells) and mean `turns` over all runs, and
+     the median (`p50`) and `p95` of the planning CPU time per run, as defined by Benchmark.py.
+   - `--report` also writes every run record as JSON.
+         python Tournament.py mazes/ [more mazes...] [--configs NAME ...] [--workers N] [--report FILE] [--quiet]
+"""
+
+########################################################################################################################################
+
+import argparse
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import Benchmark
+import HeadlessSimulator
+import MazeMap
+
+# Configuration name: (solver name in Benchmark.SOLVERS, options for the solver class)
+CONFIGS = {
+    "floodfill": ("FloodfillAlgorithm", {}),
+    "floodfill-explore-only": ("FloodfillAlgorithm", {"speed_run": False}),
+    "floodfill-optimal": ("FloodfillAlgorithm", {"exploration": "optimal"}),
+    "floodfill-diagonal": ("FloodfillAlgorithm", {"diagonal": True}),
+    "righthand": ("RighthandRule", {}),
+    "lefthand": ("LefthandRule", {}),
+}
+if MazeMap.has_numpy():
+    CONFIGS["floodfill-wavefront"] = ("FloodfillAlgorithm", {"backend": "wavefront"})
+
+
+def find_mazes(paths):
+    '''Expand the given files and directories into a sorted list of maze files.'''
+    mazes = []
+    for path in paths:
+        if os.path.isdir(path):
+            mazes.extend(Benchmark.maze_files(path))
+        else:
+            mazes.append(path)
+    return mazes
+
+
+def play_maze(maze_path, config_names):
+    '''Worker task: run every configuration on one maze and return their records.'''
+    maze = HeadlessSimulator.load_maze(maze_path)
+    records = []
+    for name in config_names:
+        solver, options = CONFIGS[name]
+        record = {"maze": maze_path, "config": name}
+        record.update(Benchmark.run_solver(solver, maze, **options))
+        records.append(record)
+    return records
+
+
+def play(maze_paths, config_names, workers=None):
+    '''Yield the records of every maze as soon as its worker finishes.'''
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(play_maze, path, config_names) for path in maze_paths]
+        for future in as_completed(futures):
+            yield from future.result()
+
+
+def percentile(sorted_values, fraction):
+    '''Nearest-rank percentile of an already sorted list.'''
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(records, config_names):
+    summary = {}
+    for name in config_names:
+        runs = [record for record in records if record["config"] == name]
+        if not runs:
+            continue
+        latencies = sorted(record["planning_cpu_ms"] for record in runs)
+        summary[name] = {
+            "runs": len(runs),
+            "success_rate": sum(record["success"] for record in runs) / len(runs),
+            "mean_cells": sum(record["cells"] for record in runs) / len(runs),
+            "mean_distance": sum(record["distance"] for record in runs) / len(runs),
+            "mean_turns": sum(record["turns"] for record in runs) / len(runs),
+            "p50_planning_ms": percentile(latencies, 0.50),
+            "p95_planning_ms": percentile(latencies, 0.95),
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play solver configurations against each other on many mazes.")
+    parser.add_argument("mazes", nargs="+", help="maze files or directories of .num / .map mazes")
+    parser.add_argument("--configs", nargs="+", choices=sorted(CONFIGS), default=list(CONFIGS),
+                        help="configurations to play (default: all)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument("--report", help="write every run record to this JSON file")
+    parser.add_argument("--quiet", action="store_true", help="only print the summary")
+    args = parser.parse_args()
+
+    maze_paths = find_mazes(args.mazes)
+    records = []
+    for record in play(maze_paths, args.configs, args.workers):
+        records.append(record)
+        if not args.quiet:
+            print("{maze:<32} {config:<24} {status:<5} {cells:>6} cells {turns:>6} turns {planning_cpu_ms:>9.2f} ms".format(
+                status="ok" if record["success"] else "FAIL", **record), flush=True)
+
+    if args.report:
+        with open(args.report, "w") as report:
+            json.dump(records, report, indent=2)
+
+    print("{} mazes x {} configurations".format(len(maze_paths), len(args.configs)))
+    print("{:<24} {:>6} {:>8} {:>10} {:>10} {:>10} {:>10} {:>10}".format(
+        "config", "runs", "success", "cells", "distance", "turns", "p50 ms", "p95 ms"))
+    for name, stats in summarize(records, args.configs).items():
+        print("{:<24} {runs:>6} {success_rate:>8.1%} {mean_cells:>10.1f} {mean_distance:>10.1f} {mean_turns:>10.1f} "
+              "{p50_planning_ms:>10.2f} {p95_planning_ms:>10.2f}".format(name, **stats))
+
+
+if __name__ == "__main__":
+    main()
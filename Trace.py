@@ -0,0 +1,118 @@
+########################################################################################################################################
+                                                              # Trace File #
+
+"""
+This script provides the solvers' logging: messages with levels that cost nothing when they are switched off, written
+either as text to stderr (what the mms GUI shows) or as a buffered JSON lines trace file for later analysis.
+
+1. Levels:
+   - `DEBUG` (every sensor read, turn and move), `INFO` (start, goal reached, timings), `WARNING` (a run that cannot
+     go on) and `OFF`.
+   - Every solver has a `LOG_LEVEL` constant and takes a `log` argument, so logging is switched per solver.
+
+2. Messages:
+   - `log.debug("Moved to ({row}, {col})", row=row, col=col)`: the message is a `str.format` template and the
+     keyword arguments are its fields. Text output formats the template; the trace keeps the fields as they are,
+     so a trace can be filtered by message and read back without parsing text.
+   - Messages below the logger's level return straight away. In hot loops the solvers also check
+     `log.debug_enabled` first, so a disabled debug message does not even build its arguments.
+
+3. Trace Files:
+   - `Logger(name, level, trace=path)` writes one JSON object per message: `t` (seconds since the trace was opened),
+     `solver`, `level`, `msg` (the template) and the fields.
+   - Records are kept in memory and written `TRACE_BUFFER` at a time (and at exit), not one write per message.
+   - Loggers given the same path share one `TraceWriter`, so a run handed from one solver to another stays in one file.
+"""
+
+########################################################################################################################################
+
+import atexit
+import json
+import sys
+import time
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+OFF = 100
+
+LEVEL_NAMES = {DEBUG: "debug", INFO: "info", WARNING: "warning"}
+
+# Records kept in memory before a trace file is written
+TRACE_BUFFER = 4096
+
+trace_writers = {}
+
+
+class TraceWriter:
+    '''Buffered JSON lines file; records are serialized only when the buffer is written.'''
+
+    def __init__(self, path):
+        self.path = path
+        self.start = time.perf_counter()
+        self.records = []
+        self.file = open(path, "w")
+        atexit.register(self.close)
+
+    def write(self, solver, level, message, fields):
+        self.records.append((time.perf_counter() - self.start, solver, level, message, fields))
+        if len(self.records) >= TRACE_BUFFER:
+            self.flush()
+
+    def flush(self):
+        if self.file is None:
+            return
+        lines = []
+        for t, solver, level, message, fields in self.records:
+            record = {"t": round(t, 6), "solver": solver, "level": LEVEL_NAMES[level], "msg": message}
+            record.update(fields)
+            lines.append(json.dumps(record, default=str) + "\n")
+        self.file.write("".join(lines))
+        self.file.flush()
+        self.records.clear()
+
+    def close(self):
+        self.flush()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def open_trace(path):
+    if path not in trace_writers:
+        trace_writers[path] = TraceWriter(path)
+    return trace_writers[path]
+
+
+class Logger:
+    def __init__(self, name, level=INFO, trace=None, stream=None):
+        self.name = name
+        self.level = level
+        self.debug_enabled = level <= DEBUG
+        self.trace = open_trace(trace) if trace is not None and level < OFF else None
+        self.stream = stream
+
+    def log(self, level, message, fields):
+        if level < self.level:
+            return
+        if self.trace is not None:
+            self.trace.write(self.name, level, message, fields)
+            return
+        stream = self.stream or sys.stderr
+        stream.write(message.format(**fields) + "\n")
+
+    def debug(self, message, **fields):
+        if self.debug_enabled:
+            self.log(DEBUG, message, fields)
+
+    def info(self, message, **fields):
+        self.log(INFO, message, fields)
+
+    def warning(self, message, **fields):
+        self.log(WARNING, message, fields)
+
+    def flush(self):
+        if self.trace is not None:
+            self.trace.flush()
+        else:
+            (self.stream or sys.stderr).flush()